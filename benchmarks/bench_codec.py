@@ -0,0 +1,69 @@
+"""Compression ratio and decode throughput of .btz against .btm.
+
+Synthetic recordings at typical densities: an office mouse (125 Hz), a
+gaming mouse (1000 Hz), typing, and the mixed session used elsewhere.
+"""
+
+import os
+import tempfile
+import time
+
+from benchmarks.generators import mixed_session, mouse_stream, typing_bursts
+from core.codec import load_compressed, save_compressed
+from core.macro_file import RECORD, save_macro
+
+WORKLOADS = {
+    "mouse_125hz": lambda s: mouse_stream(s, rate_hz=125),
+    "mouse_1000hz": lambda s: mouse_stream(s, rate_hz=1000),
+    "typing_90wpm": lambda s: typing_bursts(s),
+    "mixed": lambda s: mixed_session(s),
+}
+
+
+def measure(store, tmp, codec) -> dict:
+    n = len(store)
+    path = os.path.join(tmp, f"bench-{codec}.btz")
+    start = time.perf_counter_ns()
+    save_compressed(path, store, codec)
+    encoded = time.perf_counter_ns()
+    size = os.path.getsize(path)
+
+    macro = load_compressed(path)
+    decode_start = time.perf_counter_ns()
+    decoded = sum(len(columns["code"]) for columns in macro.chunks())
+    decode_end = time.perf_counter_ns()
+    # Random access: decode one chunk from the middle on its own
+    macro._cached = (None, None)
+    seek_start = time.perf_counter_ns()
+    macro.chunk(macro.chunk_count // 2)
+    seek_end = time.perf_counter_ns()
+    macro.close()
+    return {
+        "file_bytes": size,
+        "bytes_per_event": size / n,
+        "ratio_vs_raw": n * RECORD.size / size,
+        "encode_events_per_second": n / ((encoded - start) / 1e9),
+        "decode_events_per_second": decoded / ((decode_end - decode_start) / 1e9),
+        "chunk_decode_us": (seek_end - seek_start) / 1000,
+    }
+
+
+def run(seconds: float = 60.0) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make in WORKLOADS.items():
+            store = make(seconds)
+            btm_path = os.path.join(tmp, "bench.btm")
+            save_macro(btm_path, store)
+            results[name] = {
+                "events": len(store),
+                "btm_bytes_per_event": os.path.getsize(btm_path) / len(store),
+                "zlib": measure(store, tmp, "zlib"),
+                "lzma": measure(store, tmp, "lzma"),
+            }
+    return results
+
+
+if __name__ == "__main__":
+    import json
+    print(json.dumps(run(), indent=2))
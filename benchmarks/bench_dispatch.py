@@ -0,0 +1,84 @@
+"""Per-event dispatch cost: old string-parsing dispatch vs compiled plans.
+
+Injection is replaced by no-op calls so only the dispatch work is timed.
+Run from the repository root:  python -m benchmarks.bench_dispatch
+"""
+
+import time
+
+from benchmarks.generators import mixed_session
+from core.plan import compile_plan
+
+
+def _noop(*args, **kwargs):
+    pass
+
+
+class NullInput:
+    moveTo = mouseDown = mouseUp = keyDown = keyUp = scroll = staticmethod(_noop)
+
+
+def legacy_dispatch(events, inject=NullInput):
+    # The pre-plan Playback.play_event body, with injection stubbed out
+    for event in events:
+        etype = event["type"]
+        if etype == "move":
+            x, y = event["position"]
+            inject.moveTo(int(x), int(y))
+        elif etype == "click":
+            x, y = event["position"]
+            inject.moveTo(int(x), int(y))
+            button = str(event["button"]).lower()
+            pressed = event["pressed"]
+            if "left" in button:
+                inject.moveTo(int(x), int(y))
+                (inject.mouseDown if pressed else inject.mouseUp)(button="left")
+            elif "right" in button:
+                inject.moveTo(int(x), int(y))
+                (inject.mouseDown if pressed else inject.mouseUp)(button="right")
+        elif etype == "scroll":
+            x, y = event["position"]
+            dx, dy = event["delta"]
+            inject.moveTo(int(x), int(y))
+            inject.scroll(0, int(dy * 10))
+        elif etype == "key_press":
+            inject.keyDown(str(event["key"]).replace("'", "").replace("Key.", ""))
+        elif etype == "key_release":
+            inject.keyUp(str(event["key"]).replace("'", "").replace("Key.", ""))
+
+
+def plan_dispatch(plan):
+    handlers = (_noop,) * 6
+    for deadline, step in zip(plan.deadlines, plan.steps):
+        handlers[step[0]](step)
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        best = min(best, time.perf_counter_ns() - start)
+    return best
+
+
+def run(seconds: float = 100.0) -> dict:
+    store = mixed_session(seconds)
+    count = len(store)
+    events = list(store.view())
+    plan = compile_plan(store)
+    legacy_ns = best_of(lambda: legacy_dispatch(events))
+    compile_ns = best_of(lambda: compile_plan(store), repeat=3)
+    plan_ns = best_of(lambda: plan_dispatch(plan))
+    return {
+        "events": count,
+        "legacy_ns_per_event": legacy_ns / count,
+        "plan_ns_per_event": plan_ns / count,
+        "compile_ns_per_event": compile_ns / count,
+        "speedup": legacy_ns / plan_ns,
+    }
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print(f"{name}: {value:.2f}" if isinstance(value, float) else f"{name}: {value}")
@@ -0,0 +1,108 @@
+"""Import-time budget check for every module.
+
+Each module is imported in a fresh interpreter with ``-X importtime``. The
+check fails if a module's cumulative import time exceeds its budget, or if
+importing it drags in a heavy dependency it is not allowed to load (these
+must be imported lazily by the code that uses them).
+
+    python -m benchmarks.bench_import        # exits 1 on any violation
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("pynput", "pydirectinput", "screeninfo", "numpy", "customtkinter", "CTkMessagebox", "tkinter")
+GUI = ("customtkinter", "CTkMessagebox", "tkinter")
+
+CORE_BUDGET_MS = 30
+GUI_BUDGET_MS = 800
+# asyncio alone costs ~50 ms to import; only modules that are built on it pay this
+ASYNC_BUDGET_MS = 150
+
+# module -> (budget in ms, heavy modules it may load at import)
+BUDGETS = {
+    "main": (CORE_BUDGET_MS, ()),
+    "core.event_store": (CORE_BUDGET_MS, ()),
+    "core.macro_file": (CORE_BUDGET_MS, ()),
+    "core.scheduler": (CORE_BUDGET_MS, ()),
+    "core.simplify": (CORE_BUDGET_MS, ()),
+    "core.plan": (CORE_BUDGET_MS, ()),
+    "core.capture": (CORE_BUDGET_MS, ()),
+    "core.backends": (CORE_BUDGET_MS, ()),
+    "core.metrics": (CORE_BUDGET_MS, ()),
+    "core.remap": (CORE_BUDGET_MS, ()),
+    "core.multi": (CORE_BUDGET_MS, ()),
+    "core.async_player": (ASYNC_BUDGET_MS, ()),
+    "core.library": (CORE_BUDGET_MS, ()),
+    "core.stream_log": (CORE_BUDGET_MS, ()),
+    "core.recording": (CORE_BUDGET_MS, ()),
+    "core.playback": (CORE_BUDGET_MS, ()),
+    "core.formats": (CORE_BUDGET_MS, ()),
+    "bettertask.cli": (CORE_BUDGET_MS, ()),
+    "core.codec": (CORE_BUDGET_MS, ()),
+    "core.seek": (CORE_BUDGET_MS, ()),
+    "core.columns": (GUI_BUDGET_MS, ("numpy",)),
+    "core.editing": (GUI_BUDGET_MS, ("numpy",)),
+    "utils.screen_helper": (CORE_BUDGET_MS, ()),
+    "utils.paths": (CORE_BUDGET_MS, ()),
+    "utils.settings_store": (CORE_BUDGET_MS, ()),
+    "interface.settings_manager": (GUI_BUDGET_MS, GUI),
+    "interface.settings_window": (GUI_BUDGET_MS, GUI),
+    "interface.hotkeys_window": (GUI_BUDGET_MS, GUI),
+    "interface.macro_manager": (GUI_BUDGET_MS, GUI),
+    "interface.main_window": (GUI_BUDGET_MS, GUI),
+}
+
+# An import statement (not importlib.import_module) so -X importtime reports the module itself
+_PROBE = "import json, sys; exec('import ' + sys.argv[1]); " \
+         "print(json.dumps(sorted({m.split('.')[0] for m in sys.modules} & set(sys.argv[2:]))))"
+
+
+def measure(module: str) -> dict:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _PROBE, module, *HEAVY],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        last = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        return {"module": module, "error": last}
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative_us = int(fields[1])
+    return {
+        "module": module,
+        "cumulative_ms": (cumulative_us or 0) / 1000,
+        "heavy": json.loads(proc.stdout.strip().splitlines()[-1]),
+    }
+
+
+def check(result: dict):
+    budget_ms, allowed = BUDGETS[result["module"]]
+    if "error" in result:
+        # A missing optional GUI/NumPy dependency only means the module can't be measured here
+        return [] if allowed else [f"{result['module']}: failed to import ({result['error']})"]
+    problems = []
+    if result["cumulative_ms"] > budget_ms:
+        problems.append(f"{result['module']}: {result['cumulative_ms']:.1f} ms > {budget_ms} ms budget")
+    unexpected = sorted(set(result["heavy"]) - set(allowed))
+    if unexpected:
+        problems.append(f"{result['module']}: imports {', '.join(unexpected)} at import time")
+    return problems
+
+
+def run() -> dict:
+    results = [measure(module) for module in BUDGETS]
+    problems = [p for result in results for p in check(result)]
+    return {"modules": results, "violations": problems}
+
+
+if __name__ == "__main__":
+    report = run()
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["violations"] else 0)
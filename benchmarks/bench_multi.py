@@ -0,0 +1,68 @@
+"""Many macros at once: one heap scheduler thread vs. a Playback thread per macro.
+
+Deadlines are collapsed to ~0 with an enormous speed, so the numbers are
+pure scheduling + dispatch cost. ``events_per_cpu_second`` divides by the
+process CPU time used, i.e. throughput per core.
+"""
+
+import threading
+import time
+
+from benchmarks.generators import mixed_session
+from core.backends import FakeBackend
+from core.multi import MultiScheduler
+from core.plan import Timing
+from core.playback import Playback
+
+
+def _result(events, wall_ns, cpu_s):
+    return {
+        "events": events,
+        "events_per_second": events / (wall_ns / 1e9),
+        "events_per_cpu_second": events / cpu_s if cpu_s else None,
+    }
+
+
+def multi_scheduler(store, macros: int) -> dict:
+    scheduler = MultiScheduler()
+    timing = Timing(speed=1e9)
+    scheduler.compile(store, timing)
+    backends = [FakeBackend() for _ in range(macros)]
+    wall, cpu = time.perf_counter_ns(), time.process_time()
+    run_ids = [scheduler.start(store, backend, loops=1, timing=timing) for backend in backends]
+    for run_id in run_ids:
+        scheduler.wait(run_id)
+    result = _result(sum(len(b.calls) for b in backends), time.perf_counter_ns() - wall, time.process_time() - cpu)
+    scheduler.close()
+    return result
+
+
+def thread_per_macro(store, macros: int) -> dict:
+    players = [Playback(store, backend=FakeBackend()) for _ in range(macros)]
+    for player in players:
+        player.set_timing(speed=1e9)
+        player.plan()
+    threads = [threading.Thread(target=player.play, kwargs={"loops": 1}) for player in players]
+    wall, cpu = time.perf_counter_ns(), time.process_time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return _result(sum(len(p.backend.calls) for p in players), time.perf_counter_ns() - wall,
+                   time.process_time() - cpu)
+
+
+def run(seconds: float = 5.0) -> dict:
+    store = mixed_session(seconds)
+    results = {}
+    for macros in (1, 8, 64):
+        results[f"macros_{macros}"] = {
+            "multi_scheduler": multi_scheduler(store, macros),
+            "thread_per_macro": thread_per_macro(store, macros),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    import json
+    print(json.dumps(run(), indent=2))
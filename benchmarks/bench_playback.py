@@ -0,0 +1,63 @@
+"""Playback dispatch overhead and timing error against the fake backend."""
+
+import statistics
+import time
+
+from benchmarks.generators import mixed_session
+from core.backends import FakeBackend
+from core.playback import Playback
+
+
+def dispatch_overhead(store) -> dict:
+    # An enormous speed collapses every deadline to ~0, leaving pure dispatch cost
+    backend = FakeBackend()
+    player = Playback(store, backend=backend)
+    player.set_timing(speed=1e9)
+    player.plan()
+    start = time.perf_counter_ns()
+    player.play(loops=1)
+    elapsed = time.perf_counter_ns() - start
+    return {
+        "events": len(backend.calls),
+        "batches": backend.batches,
+        "ns_per_event": elapsed / max(1, len(backend.calls)),
+        "events_per_second": len(backend.calls) / (elapsed / 1e9),
+    }
+
+
+def timing_error(store, lateness_budget_ms: float = 2.0, batch_window_ms: float = 1.0) -> dict:
+    backend = FakeBackend()
+    player = Playback(store, backend=backend, lateness_budget_ms=lateness_budget_ms, batch_window_ms=batch_window_ms)
+    plan = player.plan()
+    player.play(loops=1)
+    origin = player.origin_ns
+    # Each step's error relative to its own deadline; negative = batched early
+    errors = [(t - origin - deadline) / 1000 for (t, _), deadline in zip(backend.calls, plan.deadlines)]
+    # Drift: how much later the last tenth of the macro runs than the first tenth
+    tenth = max(1, len(errors) // 10)
+    drift = statistics.fmean(errors[-tenth:]) - statistics.fmean(errors[:tenth])
+    errors.sort()
+    return {
+        "lateness_budget_ms": lateness_budget_ms,
+        "batch_window_ms": batch_window_ms,
+        "events": len(errors),
+        "error_us_p50": errors[len(errors) // 2],
+        "error_us_p99": errors[int(len(errors) * 0.99)],
+        "error_us_max": errors[-1],
+        "error_us_mean": statistics.fmean(errors),
+        "drift_us": drift,
+    }
+
+
+def run(seconds: float = 3.0) -> dict:
+    store = mixed_session(seconds)
+    return {
+        "dispatch": dispatch_overhead(mixed_session(30.0)),
+        "timing_precise": timing_error(store),
+        "timing_coarse": timing_error(store, lateness_budget_ms=0.0),
+    }
+
+
+if __name__ == "__main__":
+    import json
+    print(json.dumps(run(), indent=2))
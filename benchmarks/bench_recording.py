@@ -0,0 +1,116 @@
+"""Recorder append throughput and memory per event.
+
+Events from the synthetic generators are fed through the same entry points
+the pynput callbacks use (direct ``Recorder.append`` and the ring-buffer
+path), without starting any OS listeners.
+"""
+
+import time
+import tracemalloc
+
+from benchmarks.generators import mixed_session, slider_drags
+from core.capture import RingCapture
+from core.event_store import BYTES_PER_EVENT, EventStore
+from core.recording import Recorder
+from core.simplify import PathSimplifier, _segment_distance_sq, simplify_events
+
+
+def _rows(store):
+    return list(store.records())
+
+
+def bench_direct(rows, simplifier=None) -> dict:
+    recorder = Recorder(simplifier=simplifier)
+    append = recorder.append
+    start = time.perf_counter_ns()
+    for code, t, x, y, dx, dy, name in rows:
+        append(code, t, x, y, dx, dy, name)
+    recorder.flush_moves()
+    elapsed = time.perf_counter_ns() - start
+    return {
+        "events_in": len(rows),
+        "events_stored": len(recorder.store),
+        "events_per_second": len(rows) / (elapsed / 1e9),
+        "ns_per_event": elapsed / len(rows),
+    }
+
+
+def bench_ring(rows, names) -> dict:
+    recorder = Recorder()
+    capture = RingCapture(recorder.append_raw, 0, capacity=len(rows))
+    start = time.perf_counter_ns()
+    for code, t, x, y, dx, dy, name in rows:
+        (capture.keyboard_ring if name and code >= 4 else capture.mouse_ring).push(
+            code, t, x, y, dx, dy, names[name] if name else None)
+    pushed = time.perf_counter_ns()
+    capture.drain()
+    drained = time.perf_counter_ns()
+    return {
+        "push_ns_per_event": (pushed - start) / len(rows),
+        "drain_ns_per_event": (drained - pushed) / len(rows),
+        "events_per_second": len(rows) / ((drained - start) / 1e9),
+        "overflows": capture.stats.overflows,
+    }
+
+
+def bytes_per_event(rows) -> dict:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = EventStore()
+    for row in rows:
+        store.append(*row)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        "column_bytes_per_event": BYTES_PER_EVENT,
+        "allocated_bytes_per_event": (after - before) / len(rows),
+    }
+
+
+def _max_error(points, kept):
+    """Largest distance (px) from a recorded move to the kept polyline, walking both in time order."""
+    worst = 0.0
+    j = 0
+    for t, x, y in points:
+        while j + 1 < len(kept) - 1 and kept[j + 1][0] <= t:
+            j += 1
+        (_, ax, ay), (_, bx, by) = kept[j], kept[min(j + 1, len(kept) - 1)]
+        worst = max(worst, _segment_distance_sq(ax, ay, bx, by, x, y) ** 0.5)
+    return worst
+
+
+def simplify_error(tolerance_px: float = 1.0) -> dict:
+    """Both simplifiers on paths that double back; the error must stay within the tolerance."""
+    points = [(t, x, y) for _, t, x, y, *_ in slider_drags().records()]
+    online = PathSimplifier(tolerance_px)
+    kept = [p for p in (online.add(*point) for point in points) if p is not None]
+    last = online.flush()
+    if last is not None:
+        kept.append(last)
+    offline, _ = simplify_events(slider_drags(), tolerance_px)
+    offline_kept = [(t, x, y) for _, t, x, y, *_ in offline.records()]
+    return {
+        "tolerance_px": tolerance_px,
+        "online_max_error_px": _max_error(points, kept),
+        "offline_max_error_px": _max_error(points, offline_kept),
+        "online_kept": len(kept),
+        "offline_kept": len(offline_kept),
+    }
+
+
+def run(seconds: float = 30.0) -> dict:
+    session = mixed_session(seconds)
+    rows = _rows(session)
+    return {
+        "events": len(rows),
+        "direct": bench_direct(rows),
+        "direct_simplified": bench_direct(rows, PathSimplifier()),
+        "ring": bench_ring(rows, session.names),
+        "memory": bytes_per_event(rows),
+        "simplify_backtracking": simplify_error(),
+    }
+
+
+if __name__ == "__main__":
+    import json
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,40 @@
+"""Macro save / load / iterate throughput for .btm files."""
+
+import os
+import tempfile
+import time
+
+from benchmarks.generators import mixed_session
+from core.macro_file import load_macro, save_macro
+
+
+def run(seconds: float = 60.0) -> dict:
+    store = mixed_session(seconds)
+    n = len(store)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.btm")
+
+        start = time.perf_counter_ns()
+        save_macro(path, store)
+        saved = time.perf_counter_ns()
+        size = os.path.getsize(path)
+
+        macro = load_macro(path)
+        opened = time.perf_counter_ns()
+        count = sum(1 for _ in macro.records())
+        iterated = time.perf_counter_ns()
+        macro.close()
+
+    return {
+        "events": n,
+        "file_bytes": size,
+        "file_bytes_per_event": size / n,
+        "save_events_per_second": n / ((saved - start) / 1e9),
+        "open_us": (opened - saved) / 1000,
+        "iterate_events_per_second": count / ((iterated - opened) / 1e9),
+    }
+
+
+if __name__ == "__main__":
+    import json
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,88 @@
+"""Synthetic recordings at realistic densities for the benchmarks."""
+
+import math
+import random
+
+from core.event_store import (
+    EventStore,
+    EV_MOVE, EV_CLICK_DOWN, EV_CLICK_UP, EV_SCROLL, EV_KEY_PRESS, EV_KEY_RELEASE,
+)
+
+MS = 1_000_000
+
+
+def mouse_stream(seconds: float = 10.0, rate_hz: int = 1000, store=None, start_ns: int = 0, seed: int = 0):
+    """A 1000 Hz gaming mouse sweeping smooth curves, with a click every ~2 s."""
+    rng = random.Random(seed)
+    store = store if store is not None else EventStore()
+    left = store.intern("Button.left")
+    step = 1_000_000_000 // rate_hz
+    x, y = 960.0, 540.0
+    heading = 0.0
+    for i in range(int(seconds * rate_hz)):
+        t = start_ns + i * step
+        heading += rng.uniform(-0.05, 0.05)
+        x = min(max(x + 3 * math.cos(heading), 0), 1919)
+        y = min(max(y + 3 * math.sin(heading), 0), 1079)
+        store.append(EV_MOVE, t, int(x), int(y))
+        phase = i % (2 * rate_hz)
+        if phase == rate_hz:
+            store.append(EV_CLICK_DOWN, t, int(x), int(y), name=left)
+        elif phase == rate_hz + rate_hz // 12:
+            store.append(EV_CLICK_UP, t, int(x), int(y), name=left)
+    return store
+
+
+def typing_bursts(seconds: float = 10.0, wpm: int = 90, store=None, start_ns: int = 0, seed: int = 0):
+    """Press/release pairs at ``wpm`` in bursts of a few words with pauses."""
+    rng = random.Random(seed)
+    store = store if store is not None else EventStore()
+    keys = [store.intern(f"'{c}'") for c in "etaoinshrdlu"] + [store.intern("Key.space")]
+    interval = int(60_000 * MS / (wpm * 5))
+    t = start_ns
+    end = start_ns + int(seconds * 1000 * MS)
+    while t < end:
+        for _ in range(rng.randint(10, 40)):
+            key = rng.choice(keys)
+            store.append(EV_KEY_PRESS, t, name=key)
+            store.append(EV_KEY_RELEASE, t + rng.randint(40, 90) * MS, name=key)
+            t += interval + rng.randint(-20, 20) * MS
+        t += rng.randint(300, 1500) * MS
+    return store
+
+
+def scroll_storm(seconds: float = 10.0, rate_hz: int = 120, store=None, start_ns: int = 0):
+    """Free-spinning wheel: scroll events at ``rate_hz`` in alternating directions."""
+    store = store if store is not None else EventStore()
+    step = 1_000_000_000 // rate_hz
+    for i in range(int(seconds * rate_hz)):
+        store.append(EV_SCROLL, start_ns + i * step, 800, 600, 0, -1 if (i // rate_hz) % 2 else 1)
+    return store
+
+
+def mixed_session(seconds: float = 10.0, seed: int = 0) -> EventStore:
+    """Mouse, typing and scrolling interleaved in timestamp order."""
+    parts = [mouse_stream(seconds, seed=seed), typing_bursts(seconds, seed=seed), scroll_storm(seconds / 5)]
+    rows = []
+    store = EventStore()
+    for part in parts:
+        for code, t, x, y, dx, dy, name in part.records():
+            rows.append((t, code, x, y, dx, dy, store.intern(part.names[name]) if name else 0))
+    rows.sort()
+    for t, code, x, y, dx, dy, name in rows:
+        store.append(code, t, x, y, dx, dy, name)
+    return store
+
+
+def slider_drags(seconds: float = 5.0, rate_hz: int = 1000, store=None, start_ns: int = 0, width: int = 100):
+    """A slider dragged ``width`` px one way, then half of that back, over and over."""
+    store = store if store is not None else EventStore()
+    step = 1_000_000_000 // rate_hz
+    x, direction, travelled = 0, 1, 0
+    for i in range(int(seconds * rate_hz)):
+        store.append(EV_MOVE, start_ns + i * step, 100 + x, 300)
+        x += direction
+        travelled += 1
+        if travelled == (width if direction > 0 else width // 2):
+            direction, travelled = -direction, 0
+    return store
@@ -0,0 +1,66 @@
+"""Run every benchmark and write the results as JSON.
+
+    python -m benchmarks.run --out bench.json
+
+Each section is independent; one that cannot run here (e.g. pynput missing
+for the recorder) is reported with its error instead of aborting the run.
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import subprocess
+import sys
+import time
+
+SUITES = {
+    "recording": "benchmarks.bench_recording",
+    "dispatch": "benchmarks.bench_dispatch",
+    "playback": "benchmarks.bench_playback",
+    "multi": "benchmarks.bench_multi",
+    "storage": "benchmarks.bench_storage",
+    "codec": "benchmarks.bench_codec",
+    "imports": "benchmarks.bench_import",
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BetterTask benchmarks")
+    parser.add_argument("--out", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--only", choices=sorted(SUITES), action="append", help="run only these suites")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+    }
+    for name in args.only or SUITES:
+        print(f"[INFO] Running {name} benchmark...", file=sys.stderr)
+        try:
+            results[name] = importlib.import_module(SUITES[name]).run()
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
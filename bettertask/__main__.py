@@ -0,0 +1,5 @@
+import sys
+
+from bettertask.cli import main
+
+sys.exit(main())
@@ -0,0 +1,403 @@
+"""Headless command line for BetterTask.
+
+    python -m bettertask record --out macro.btm [--duration 30]
+    python -m bettertask play macro.btm --loops 10 --speed 2
+    python -m bettertask inspect macro.btm [--json]
+    python -m bettertask convert macro.json macro.btm [--simplify 1.0]
+    python -m bettertask convert macro.btm macro.btz [--codec lzma]
+    python -m bettertask edit macro.btm out.btm --trim 2 30 --drop scroll --translate 0 -40
+    python -m bettertask recover crashed.btlog [macro.btm]
+    python -m bettertask daemon [--port 8765]
+
+Nothing here imports the GUI; Recorder and Playback are driven directly.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from core.event_store import NS_PER_SECOND
+from core.formats import event_histogram, open_macro, write_macro
+from core.multi import MultiScheduler
+from core.plan import PlanCache
+from core.stream_log import LOG_EXTENSION, recover_log
+
+DEFAULT_PORT = 8765
+
+
+def _open_or_exit(path):
+    try:
+        return open_macro(path)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Failed to open {path}: {e}", file=sys.stderr)
+        sys.exit(2)
+
+
+def cmd_record(args):
+    from core.recording import Recorder
+    from core.simplify import PathSimplifier
+
+    simplifier = PathSimplifier(args.tolerance, args.min_interval) if args.tolerance > 0 else None
+    stream_path = os.path.splitext(args.out)[0] + LOG_EXTENSION if args.stream else None
+    recorder = Recorder(simplifier=simplifier, capture=args.capture, stream_path=stream_path)
+    recorder.start_recording()
+    print("[INFO] Recording... press Ctrl+C to stop", file=sys.stderr)
+    try:
+        if args.duration:
+            time.sleep(args.duration)
+        else:
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    recorder.stop_recording()
+    # A streamed recording already ends up as <out>.btm; other formats are converted from it
+    if os.path.abspath(getattr(recorder.store, "path", "")) != os.path.abspath(args.out):
+        write_macro(args.out, recorder.store)
+    print(f"[INFO] Saved {len(recorder.store)} events to {args.out}", file=sys.stderr)
+    return 0
+
+
+def cmd_recover(args):
+    try:
+        result = recover_log(args.log, args.out)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Failed to recover {args.log}: {e}", file=sys.stderr)
+        return 2
+    state = "closed cleanly" if result["clean"] else f"torn; {result['discarded_bytes']} trailing bytes dropped"
+    print(f"[INFO] Recovered {result['events']} events ({result['chunks']} chunks, {state}) to {result['out_path']}",
+          file=sys.stderr)
+    return 0
+
+
+def make_player(macro, args, plan_cache=None):
+    from core.backends import create_backend
+    from core.playback import Playback
+
+    player = Playback(macro, backend=create_backend(args.backend), precise=not args.coarse, plan_cache=plan_cache)
+    player.set_timing(args.speed, args.idle_gap, args.idle_gap_to)
+    start, end = getattr(args, "start", 0.0), getattr(args, "end", None)
+    if start or end is not None:
+        player.set_window(start * 1000, end * 1000 if end is not None else None)
+    return player
+
+
+def play_loops(player, loops, duration_s=None):
+    """Play ``loops`` times (0 = until stopped) on one timeline; returns loops completed."""
+    try:
+        return player.play(loops, duration_s)
+    except KeyboardInterrupt:
+        # Playback.play has already released what the macro held at that point
+        return player.loops_done
+
+
+def cmd_play(args):
+    macro = _open_or_exit(args.macro)
+    try:
+        player = make_player(macro, args)
+        duration_ns = player.duration_ns()
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+    print(f"[INFO] {len(macro)} events, {duration_ns / NS_PER_SECOND:.2f}s per loop "
+          f"(~{player.loops_per_hour():.0f} loops/hour)", file=sys.stderr)
+    done = play_loops(player, args.loops, args.duration)
+    print(f"[INFO] Completed {done} loop(s)", file=sys.stderr)
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(player.metrics.to_prometheus() if args.metrics.endswith(".prom") else player.metrics.to_json(indent=2))
+    return 0
+
+
+def describe(macro) -> dict:
+    return {
+        "events": len(macro),
+        "duration_s": macro.duration_ns() / NS_PER_SECOND,
+        "event_types": event_histogram(macro),
+        "names": [n for n in macro.names if n],
+        "geometry": [list(rect) for rect in macro.geometry] if getattr(macro, "geometry", None) else None,
+        "format_version": getattr(macro, "version", None),
+    }
+
+
+def cmd_inspect(args):
+    info = describe(_open_or_exit(args.macro))
+    if args.json:
+        print(json.dumps(info, indent=2))
+        return 0
+    print(f"Events:   {info['events']}")
+    print(f"Duration: {info['duration_s']:.3f}s")
+    for name, count in sorted(info["event_types"].items()):
+        print(f"  {name:<12} {count}")
+    if info["geometry"]:
+        print(f"Monitors: {', '.join('{}x{}@{},{}'.format(w, h, x, y) for x, y, w, h in info['geometry'])}")
+    return 0
+
+
+def cmd_convert(args):
+    macro = _open_or_exit(args.source)
+    if args.simplify > 0:
+        from core.simplify import simplify_events
+        macro, removed = simplify_events(macro, args.simplify)
+        print(f"[INFO] Simplification removed {removed} move events", file=sys.stderr)
+    try:
+        write_macro(args.dest, macro, codec=args.codec)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Failed to write {args.dest}: {e}", file=sys.stderr)
+        return 2
+    print(f"[INFO] Wrote {len(macro)} events to {args.dest}", file=sys.stderr)
+    return 0
+
+
+def _seconds_ns(value):
+    return int(round(float(value) * NS_PER_SECOND))
+
+
+def cmd_edit(args):
+    from core.editing import EditableMacro
+
+    macro = EditableMacro.from_source(_open_or_exit(args.source))
+    before = len(macro)
+    try:
+        if args.keep or args.drop:
+            macro = macro.filter(args.keep, args.drop)
+        # Later cuts first, so the earlier ranges still refer to the original timeline
+        for start, end in sorted(args.cut or (), reverse=True):
+            macro = macro.cut(_seconds_ns(start), _seconds_ns(end))
+        if args.trim:
+            macro = macro.trim(_seconds_ns(args.trim[0]), _seconds_ns(args.trim[1]))
+        for start, end, factor in args.stretch or ():
+            macro = macro.stretch(_seconds_ns(start), _seconds_ns(end), factor)
+        for at, delta in args.shift or ():
+            macro = macro.shift(_seconds_ns(at), _seconds_ns(delta))
+        if args.translate:
+            macro = macro.translate(*args.translate)
+        if args.scale:
+            macro = macro.scale(*args.scale)
+        if args.append:
+            macro = macro.concat(*(_open_or_exit(path) for path in args.append), gap_ns=_seconds_ns(args.gap))
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+    try:
+        write_macro(args.dest, macro.to_store(), codec=args.codec)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Failed to write {args.dest}: {e}", file=sys.stderr)
+        return 2
+    print(f"[INFO] Wrote {len(macro)} events ({before} before editing), "
+          f"{macro.duration_ns() / NS_PER_SECOND:.2f}s, to {args.dest}", file=sys.stderr)
+    return 0
+
+
+class MacroDaemon:
+    """Keeps macros open and their plans compiled between runs.
+
+    Requests are JSON objects, one per line; every reply is one JSON line:
+
+        {"cmd": "load", "path": "..."}
+        {"cmd": "play", "path": "...", "loops": 1, "speed": 1.0}   -> {"ok": true, "run": 3}
+        {"cmd": "stop", "run": 3}
+        {"cmd": "status"}
+        {"cmd": "unload", "path": "..."}
+        {"cmd": "shutdown"}
+    """
+
+    def __init__(self, args):
+        self.args = args
+        # Every run is played by one scheduler thread, whatever the number of macros
+        self.scheduler = MultiScheduler(lateness_budget_ms=0.0 if args.coarse else 2.0,
+                                        plan_cache=PlanCache(max_entries=256))
+        self.macros = {}
+        self._lock = threading.Lock()
+        self.server = None
+
+    def warm(self, path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            cached = self.macros.get(path)
+            if cached is not None and cached[0] == (st.st_mtime_ns, st.st_size):
+                return cached[1]
+        macro = open_macro(path)
+        # Compile now so the first play starts immediately
+        self.scheduler.compile(macro)
+        with self._lock:
+            stale = self.macros.get(path)
+            self.macros[path] = ((st.st_mtime_ns, st.st_size), macro)
+        if stale is not None:
+            self.release(stale[1])
+        return macro
+
+    def release(self, macro):
+        """Drop a macro's compiled plans and close its file."""
+        self.scheduler.plan_cache.discard(macro)
+        close = getattr(macro, "close", None)
+        if close is not None:
+            close()
+
+    def handle(self, request: dict) -> dict:
+        cmd = request.get("cmd")
+        if cmd == "load":
+            macro = self.warm(request["path"])
+            return {"ok": True, "events": len(macro)}
+        if cmd == "play":
+            return self.play(request)
+        if cmd == "stop":
+            self.scheduler.stop(request.get("run"))
+            return {"ok": True}
+        if cmd == "status":
+            with self._lock:
+                macros = sorted(self.macros)
+            runs = {str(run_id): info for run_id, info in self.scheduler.status().items()}
+            return {"ok": True, "macros": macros, "runs": runs, "events_dispatched": self.scheduler.events_dispatched}
+        if cmd == "unload":
+            with self._lock:
+                cached = self.macros.pop(os.path.abspath(request["path"]), None)
+            if cached is not None:
+                self.release(cached[1])
+            return {"ok": True}
+        if cmd == "shutdown":
+            self.scheduler.stop_all()
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown command: {cmd}"}
+
+    def play(self, request):
+        from core.backends import create_backend
+        from core.plan import Timing
+
+        macro = self.warm(request["path"])
+        timing = Timing(float(request.get("speed", self.args.speed)),
+                        float(request.get("idle_gap", self.args.idle_gap)),
+                        float(request.get("idle_gap_to", self.args.idle_gap_to)))
+        run_id = self.scheduler.start(macro, create_backend(self.args.backend),
+                                      loops=int(request.get("loops", 1)), timing=timing)
+        return {"ok": True, "run": run_id}
+
+    def serve(self, host, port):
+        import socketserver
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        reply = daemon.handle(json.loads(line))
+                    except (OSError, ValueError, KeyError) as e:
+                        reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                    self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        with socketserver.ThreadingTCPServer((host, port), Handler) as server:
+            self.server = server
+            print(f"[INFO] BetterTask daemon listening on {host}:{port}", file=sys.stderr)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+
+
+def cmd_daemon(args):
+    from utils.screen_helper import start_monitor_watcher
+
+    # Plans are remapped per layout version; keep the version current while the daemon runs
+    start_monitor_watcher()
+    daemon = MacroDaemon(args)
+    for path in args.preload:
+        daemon.warm(path)
+    daemon.serve(args.host, args.port)
+    return 0
+
+
+def _add_playback_options(parser):
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed multiplier (default 1.0)")
+    parser.add_argument("--idle-gap", type=float, default=0.0, metavar="MS",
+                        help="shorten pauses longer than this many ms (0 = off)")
+    parser.add_argument("--idle-gap-to", type=float, default=100.0, metavar="MS",
+                        help="length to shorten long pauses to (default 100)")
+    parser.add_argument("--backend", choices=("pydirectinput", "pynput", "fake"),
+                        help="injection backend (default: pydirectinput on Windows, pynput elsewhere)")
+    parser.add_argument("--coarse", action="store_true", help="sleep only; no spin-wait before deadlines")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bettertask", description="Record and play back input macros.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="record input to a macro file")
+    record.add_argument("--out", required=True, help="output file (.btm or .json)")
+    record.add_argument("--duration", type=float, default=0.0, help="seconds to record (default: until Ctrl+C)")
+    record.add_argument("--tolerance", type=float, default=1.0, help="path simplification tolerance in px (0 = off)")
+    record.add_argument("--min-interval", type=float, default=0.0, help="minimum ms between kept moves")
+    record.add_argument("--capture", choices=("ring", "direct"), default="ring")
+    record.add_argument("--stream", action="store_true",
+                        help="stream to an append-only log next to --out (bounded memory, crash-safe)")
+    record.set_defaults(func=cmd_record)
+
+    play = sub.add_parser("play", help="play a macro file")
+    play.add_argument("macro")
+    play.add_argument("--loops", type=int, default=1, help="number of loops (0 = until Ctrl+C)")
+    play.add_argument("--duration", type=float, metavar="S", help="stop after this many seconds, even mid-loop")
+    play.add_argument("--metrics", help="write session metrics here (.json or .prom)")
+    play.add_argument("--start", type=float, default=0.0, metavar="S", help="start this many seconds into the macro")
+    play.add_argument("--end", type=float, metavar="S", help="stop this many seconds into the macro (default: the end)")
+    _add_playback_options(play)
+    play.set_defaults(func=cmd_play)
+
+    inspect = sub.add_parser("inspect", help="summarise a macro file")
+    inspect.add_argument("macro")
+    inspect.add_argument("--json", action="store_true")
+    inspect.set_defaults(func=cmd_inspect)
+
+    convert = sub.add_parser("convert", help="convert between macro formats")
+    convert.add_argument("source")
+    convert.add_argument("dest")
+    convert.add_argument("--simplify", type=float, default=0.0, metavar="PX",
+                         help="simplify mouse paths with this tolerance while converting")
+    convert.add_argument("--codec", choices=("zlib", "lzma"), default="zlib", help="compression for .btz output")
+    convert.set_defaults(func=cmd_convert)
+
+    edit = sub.add_parser("edit", help="trim, cut, retime, move or combine a macro",
+                          description="Edits are applied in this order: --keep/--drop, --cut, --trim, --stretch, "
+                                      "--shift, --translate, --scale, --append. Times are in seconds.")
+    edit.add_argument("source")
+    edit.add_argument("dest")
+    edit.add_argument("--keep", nargs="+", metavar="TYPE", help="keep only these event types (move, click, ...)")
+    edit.add_argument("--drop", nargs="+", metavar="TYPE", help="remove these event types")
+    edit.add_argument("--cut", nargs=2, type=float, action="append", metavar=("START", "END"),
+                      help="remove this range and close the gap (repeatable)")
+    edit.add_argument("--trim", nargs=2, type=float, metavar=("START", "END"), help="keep only this range")
+    edit.add_argument("--stretch", nargs=3, type=float, action="append", metavar=("START", "END", "FACTOR"),
+                      help="scale time in this range (repeatable)")
+    edit.add_argument("--shift", nargs=2, type=float, action="append", metavar=("AT", "DELTA"),
+                      help="move everything from AT on by DELTA seconds (repeatable)")
+    edit.add_argument("--translate", nargs=2, type=int, metavar=("DX", "DY"), help="move pointer events by pixels")
+    edit.add_argument("--scale", nargs=2, type=float, metavar=("SX", "SY"), help="scale pointer positions")
+    edit.add_argument("--append", nargs="+", metavar="FILE", help="macros to play after this one")
+    edit.add_argument("--gap", type=float, default=0.0, help="seconds between appended macros")
+    edit.add_argument("--codec", choices=("zlib", "lzma"), default="zlib", help="compression for .btz output")
+    edit.set_defaults(func=cmd_edit)
+
+    recover = sub.add_parser("recover", help="salvage a recording log left by a crash into a macro")
+    recover.add_argument("log")
+    recover.add_argument("out", nargs="?", help="output .btm (default: next to the log)")
+    recover.set_defaults(func=cmd_recover)
+
+    daemon = sub.add_parser("daemon", help="serve play requests with macros kept compiled in memory")
+    daemon.add_argument("--host", default="127.0.0.1")
+    daemon.add_argument("--port", type=int, default=DEFAULT_PORT)
+    daemon.add_argument("--preload", nargs="*", default=[], help="macro files to compile at startup")
+    _add_playback_options(daemon)
+    daemon.set_defaults(func=cmd_daemon)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
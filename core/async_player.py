@@ -0,0 +1,205 @@
+"""asyncio playback.
+
+``AsyncPlayer.play`` is a coroutine: it sleeps with ``asyncio.sleep`` between
+batches instead of blocking a thread, is stopped by cancelling its task,
+and can be paused and resumed. A paused run keeps its place; on resume the
+rest of the timeline is shifted by the time spent paused.
+
+Progress is published as ``Progress`` tuples to any number of async
+iterators from ``player.progress()``:
+
+    player = AsyncPlayer(backend)
+    task = asyncio.create_task(player.play(macro, loops=3))
+    async for p in player.progress():
+        print(p.kind, p.loop, p.index, p.total)
+"""
+
+import asyncio
+import time
+from bisect import bisect_right
+from typing import NamedTuple
+
+from core.metrics import SessionMetrics
+from core.plan import PlanCache, PlaybackPlan, Timing
+from core.remap import RemapCache, compile_for_layout
+from core.seek import held_index, release_steps
+
+# Progress kinds
+STARTED = "started"
+STEP = "step"
+LOOP = "loop"
+PAUSED = "paused"
+RESUMED = "resumed"
+FINISHED = "finished"
+CANCELLED = "cancelled"
+
+PROGRESS_QUEUE_SIZE = 1024
+
+
+class Progress(NamedTuple):
+    kind: str
+    loop: int  # loops completed so far
+    index: int  # steps of the current loop dispatched so far
+    total: int  # steps per loop
+    lateness_ns: int = 0
+
+
+class AsyncPlayer:
+    """Plays one macro at a time on the running event loop.
+
+    ``spin_ms`` is the stretch before each deadline that is busy-waited
+    rather than slept. Spinning blocks every other task on the loop, so it
+    defaults to 0 (plain ``asyncio.sleep``; expect ~1 ms of timer jitter).
+    """
+
+    def __init__(self, backend=None, batch_window_ms=1.0, spin_ms=0.0, plan_cache=None):
+        if backend is None:
+            from core.backends import create_backend
+            backend = create_backend()
+        self.backend = backend
+        self.batch_window_ns = int(batch_window_ms * 1_000_000)
+        self.spin_ns = int(spin_ms * 1_000_000)
+        self.plan_cache = plan_cache if plan_cache is not None else PlanCache()
+        self.remap_cache = RemapCache(max_entries=8)
+        self.metrics = SessionMetrics("playback")
+        self.playing = False
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        self._pause_requested = asyncio.Event()
+        self._subscribers = []
+        # STARTED of the run in progress, handed to subscribers that join late
+        self._started = None
+
+    @property
+    def paused(self):
+        return not self._resumed.is_set()
+
+    def pause(self):
+        self._resumed.clear()
+        self._pause_requested.set()
+
+    def resume(self):
+        self._pause_requested.clear()
+        self._resumed.set()
+
+    def compile(self, events, timing: Timing = None) -> PlaybackPlan:
+        return compile_for_layout(events, self.plan_cache, self.remap_cache, timing)
+
+    async def progress(self):
+        """Yield Progress tuples until the current (or next) run ends.
+
+        A slow consumer misses intermediate STEP updates rather than
+        holding up playback; the final FINISHED/CANCELLED is always delivered.
+        """
+        queue = asyncio.Queue(PROGRESS_QUEUE_SIZE)
+        if self._started is not None:
+            queue.put_nowait(self._started)
+        self._subscribers.append(queue)
+        try:
+            while True:
+                item = await queue.get()
+                yield item
+                if item.kind in (FINISHED, CANCELLED):
+                    return
+        finally:
+            self._subscribers.remove(queue)
+
+    def _publish(self, item):
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                if item.kind == STEP:
+                    continue
+                # Make room for a state change by dropping the oldest update
+                queue.get_nowait()
+                queue.put_nowait(item)
+
+    async def play(self, events, loops: int = 1, timing: Timing = None) -> int:
+        """Play ``loops`` times (0 = until cancelled); returns loops completed."""
+        if self.playing:
+            raise RuntimeError("AsyncPlayer is already playing")
+        plan = events if isinstance(events, PlaybackPlan) else self.compile(events, timing)
+        total = len(plan)
+        self.playing = True
+        self.metrics = SessionMetrics("playback")
+        done = 0
+        index = 0
+        self._started = Progress(STARTED, 0, 0, total)
+        self._publish(self._started)
+        try:
+            if not total:
+                self._publish(Progress(FINISHED, 0, 0, 0))
+                return 0
+            held = held_index(plan)
+            loop_release = release_steps(held.state_at(total), plan.steps)
+            origin_ns = time.perf_counter_ns()
+            while not loops or done < loops:
+                loop_start = time.perf_counter_ns()
+                while index < total:
+                    origin_ns += await self._wait(origin_ns + plan.deadlines[index],
+                                                  Progress(PAUSED, done, index, total))
+                    index = self._dispatch(plan, origin_ns, index, done)
+                # Only what the macro leaves held is released between loops
+                if loop_release:
+                    self.backend.execute(loop_release)
+                index = 0
+                done += 1
+                self.metrics.record_loop(time.perf_counter_ns() - loop_start)
+                self._publish(Progress(LOOP, done, total, total))
+                origin_ns += plan.duration_ns
+        except asyncio.CancelledError:
+            self._publish(Progress(CANCELLED, done, index, total))
+            raise
+        finally:
+            self.playing = False
+            self._started = None
+            self.metrics.finish()
+            if total and index:
+                # Cancelled mid-loop: let go of what is held at the step reached
+                steps = release_steps(held.state_at(index), plan.steps)
+                if steps:
+                    self.backend.execute(steps)
+        self._publish(Progress(FINISHED, done, total, total))
+        return done
+
+    async def _wait(self, deadline_ns, paused_progress):
+        """Sleep until ``deadline_ns``; returns how long it spent paused (ns).
+
+        Time spent paused pushes the deadline, and the rest of the timeline, back.
+        """
+        clock = time.perf_counter_ns
+        paused_ns = 0
+        while True:
+            if self.paused:
+                paused_at = clock()
+                self._publish(paused_progress)
+                await self._resumed.wait()
+                shift = clock() - paused_at
+                paused_ns += shift
+                deadline_ns += shift
+                self._publish(paused_progress._replace(kind=RESUMED))
+            remaining = deadline_ns - clock() - self.spin_ns
+            if remaining <= 0:
+                break
+            try:
+                # Sleep, but wake straight away if pause() is called meanwhile
+                await asyncio.wait_for(self._pause_requested.wait(), remaining / 1_000_000_000)
+            except asyncio.TimeoutError:
+                break
+        while clock() < deadline_ns:
+            pass
+        return paused_ns
+
+    def _dispatch(self, plan, origin_ns, i, loop):
+        deadlines, steps = plan.deadlines, plan.steps
+        now = time.perf_counter_ns() - origin_ns
+        j = bisect_right(deadlines, max(deadlines[i] + self.batch_window_ns, now), i + 1, len(steps))
+        self.backend.execute(steps[i:j])
+        metrics = self.metrics
+        for k in range(i, j):
+            metrics.record_lateness(now - deadlines[k])
+        metrics.events += j - i
+        if self._subscribers:
+            self._publish(Progress(STEP, loop, j, len(steps), now - deadlines[i]))
+        return j
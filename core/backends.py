@@ -0,0 +1,296 @@
+"""Input-injection backends used by Playback.
+
+A backend receives plan steps (``(opcode, x, y, arg)`` tuples, see
+core.plan) in batches: every step that falls due in the same scheduler tick
+is handed over in one ``execute`` call. Injection libraries are imported
+when a backend is created, not when this module is imported.
+"""
+
+import sys
+import time
+from abc import ABC, abstractmethod
+
+from core.plan import OP_MOVE, OP_MOUSE_DOWN, OP_MOUSE_UP, OP_SCROLL, OP_KEY_DOWN, OP_KEY_UP
+
+
+class InjectionBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def move(self, x, y):
+        ...
+
+    @abstractmethod
+    def mouse_down(self, x, y, button):
+        ...
+
+    @abstractmethod
+    def mouse_up(self, x, y, button):
+        ...
+
+    @abstractmethod
+    def scroll(self, x, y, amount):
+        ...
+
+    @abstractmethod
+    def key_down(self, key):
+        ...
+
+    @abstractmethod
+    def key_up(self, key):
+        ...
+
+    def execute(self, steps):
+        move, down, up, scroll = self.move, self.mouse_down, self.mouse_up, self.scroll
+        for op, x, y, arg in steps:
+            if op == OP_MOVE:
+                move(x, y)
+            elif op == OP_MOUSE_DOWN:
+                down(x, y, arg)
+            elif op == OP_MOUSE_UP:
+                up(x, y, arg)
+            elif op == OP_SCROLL:
+                scroll(x, y, arg)
+            elif op == OP_KEY_DOWN:
+                self._key(self.key_down, "press", arg)
+            elif op == OP_KEY_UP:
+                self._key(self.key_up, "release", arg)
+        self.flush()
+
+    def _key(self, fn, action, key):
+        try:
+            fn(key)
+        except Exception as e:
+            print(f"[WARN] Could not {action} key {key}: {e}")
+
+    def flush(self):
+        pass
+
+    def release(self, buttons=(), keys=()):
+        for button in buttons:
+            self.mouse_up(None, None, button)
+        for key in keys:
+            self._key(self.key_up, "release", key)
+        self.flush()
+
+    def close(self):
+        pass
+
+
+# Win32 SendInput constants (winuser.h)
+_INPUT_MOUSE = 0
+_INPUT_KEYBOARD = 1
+_MOUSEEVENTF_MOVE = 0x0001
+_MOUSEEVENTF_WHEEL = 0x0800
+_MOUSEEVENTF_VIRTUALDESK = 0x4000
+_MOUSEEVENTF_ABSOLUTE = 0x8000
+_MOUSE_BUTTON_FLAGS = {"left": (0x0002, 0x0004), "right": (0x0008, 0x0010), "middle": (0x0020, 0x0040)}
+_KEYEVENTF_EXTENDEDKEY = 0x0001
+_KEYEVENTF_KEYUP = 0x0002
+_KEYEVENTF_SCANCODE = 0x0008
+_WHEEL_DELTA = 120
+_EXTENDED_KEYS = ("up", "down", "left", "right")
+
+
+def _send_input_types():
+    """ctypes INPUT structures, defined on first use."""
+    import ctypes
+    from ctypes import wintypes
+
+    class MOUSEINPUT(ctypes.Structure):
+        _fields_ = [("dx", wintypes.LONG), ("dy", wintypes.LONG), ("mouseData", wintypes.DWORD),
+                    ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+    class KEYBDINPUT(ctypes.Structure):
+        _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD), ("dwFlags", wintypes.DWORD),
+                    ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+    class HARDWAREINPUT(ctypes.Structure):
+        _fields_ = [("uMsg", wintypes.DWORD), ("wParamL", wintypes.WORD), ("wParamH", wintypes.WORD)]
+
+    class INPUTUNION(ctypes.Union):
+        _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("hi", HARDWAREINPUT)]
+
+    class INPUT(ctypes.Structure):
+        _fields_ = [("type", wintypes.DWORD), ("u", INPUTUNION)]
+
+    return INPUT, MOUSEINPUT, KEYBDINPUT, INPUTUNION
+
+
+class PyDirectInputBackend(InjectionBackend):
+    """DirectInput scan codes on Windows, sent with one SendInput call per batch.
+
+    Every step of a batch is turned into Win32 INPUT structures and
+    ``flush`` hands them all to ``SendInput`` at once, so a batch reaches
+    the OS input queue as one unit instead of one syscall (and, in
+    pydirectinput, one ``PAUSE`` sleep) per step. Key names are mapped to
+    scan codes with pydirectinput's table, as pydirectinput itself does.
+    """
+
+    name = "pydirectinput"
+
+    def __init__(self):
+        import ctypes
+        import pydirectinput
+        self.key_codes = pydirectinput.KEYBOARD_MAPPING
+        self._user32 = ctypes.windll.user32
+        self._sizeof = ctypes.sizeof
+        self._INPUT, self._MOUSEINPUT, self._KEYBDINPUT, self._UNION = _send_input_types()
+        self._pending = []
+
+    def _desktop(self):
+        # Virtual desktop rect (SM_[XY]VIRTUALSCREEN, SM_C[XY]VIRTUALSCREEN); read per batch
+        # so a monitor layout change is picked up
+        metrics = self._user32.GetSystemMetrics
+        return metrics(76), metrics(77), max(2, metrics(78)), max(2, metrics(79))
+
+    def _mouse(self, flags, x=None, y=None, data=0):
+        dx = dy = 0
+        if x is not None:
+            left, top, width, height = self._desktop_rect
+            dx = (int(x) - left) * 65535 // (width - 1)
+            dy = (int(y) - top) * 65535 // (height - 1)
+            flags |= _MOUSEEVENTF_MOVE | _MOUSEEVENTF_ABSOLUTE | _MOUSEEVENTF_VIRTUALDESK
+        mouse = self._MOUSEINPUT(dx, dy, data & 0xFFFFFFFF, flags, 0, 0)
+        self._pending.append(self._INPUT(_INPUT_MOUSE, self._UNION(mi=mouse)))
+
+    def _keyboard(self, key, up):
+        scan = self.key_codes.get(key)
+        if scan is None:
+            raise KeyError(f"no scan code for {key!r}")
+        flags = _KEYEVENTF_SCANCODE | (_KEYEVENTF_KEYUP if up else 0)
+        if key in _EXTENDED_KEYS:
+            flags |= _KEYEVENTF_EXTENDEDKEY
+        keyboard = self._KEYBDINPUT(0, scan, flags, 0, 0)
+        self._pending.append(self._INPUT(_INPUT_KEYBOARD, self._UNION(ki=keyboard)))
+
+    def execute(self, steps):
+        self._desktop_rect = self._desktop()
+        super().execute(steps)
+
+    def release(self, buttons=(), keys=()):
+        self._desktop_rect = self._desktop()
+        super().release(buttons, keys)
+
+    def move(self, x, y):
+        self._mouse(0, x, y)
+
+    def mouse_down(self, x, y, button):
+        self._mouse(_MOUSE_BUTTON_FLAGS[button][0], x, y)
+
+    def mouse_up(self, x, y, button):
+        self._mouse(_MOUSE_BUTTON_FLAGS[button][1], x, y)
+
+    def scroll(self, x, y, amount):
+        self._mouse(_MOUSEEVENTF_WHEEL, x, y, int(amount) * _WHEEL_DELTA)
+
+    def key_down(self, key):
+        self._keyboard(key, False)
+
+    def key_up(self, key):
+        self._keyboard(key, True)
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        if pending:
+            inputs = (self._INPUT * len(pending))(*pending)
+            self._user32.SendInput(len(pending), inputs, self._sizeof(self._INPUT))
+
+
+class PynputBackend(InjectionBackend):
+    """pynput controllers; on Linux this injects through the X server's
+    XTest extension, the same mechanism xdotool uses."""
+
+    name = "pynput"
+
+    def __init__(self):
+        from pynput import keyboard, mouse
+        self.mouse = mouse.Controller()
+        self.keyboard = keyboard.Controller()
+        self.buttons = {"left": mouse.Button.left, "right": mouse.Button.right}
+        self._key_type = keyboard.Key
+        self._keys = {}
+
+    def resolve_key(self, key):
+        resolved = self._keys.get(key)
+        if resolved is None:
+            resolved = getattr(self._key_type, key, None) or key
+            self._keys[key] = resolved
+        return resolved
+
+    def move(self, x, y):
+        self.mouse.position = (x, y)
+
+    def mouse_down(self, x, y, button):
+        if x is not None:
+            self.mouse.position = (x, y)
+        self.mouse.press(self.buttons[button])
+
+    def mouse_up(self, x, y, button):
+        if x is not None:
+            self.mouse.position = (x, y)
+        self.mouse.release(self.buttons[button])
+
+    def scroll(self, x, y, amount):
+        self.mouse.position = (x, y)
+        self.mouse.scroll(0, amount)
+
+    def key_down(self, key):
+        self.keyboard.press(self.resolve_key(key))
+
+    def key_up(self, key):
+        self.keyboard.release(self.resolve_key(key))
+
+
+class FakeBackend(InjectionBackend):
+    """Records what it was asked to inject; for tests and benchmarks."""
+
+    name = "fake"
+
+    def __init__(self, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.calls = []
+        self.batches = 0
+
+    def execute(self, steps):
+        now = self.clock()
+        self.calls.extend((now, step) for step in steps)
+        self.batches += 1
+
+    def move(self, x, y):
+        self.calls.append((self.clock(), (OP_MOVE, x, y, None)))
+
+    def mouse_down(self, x, y, button):
+        self.calls.append((self.clock(), (OP_MOUSE_DOWN, x, y, button)))
+
+    def mouse_up(self, x, y, button):
+        self.calls.append((self.clock(), (OP_MOUSE_UP, x, y, button)))
+
+    def scroll(self, x, y, amount):
+        self.calls.append((self.clock(), (OP_SCROLL, x, y, amount)))
+
+    def key_down(self, key):
+        self.calls.append((self.clock(), (OP_KEY_DOWN, 0, 0, key)))
+
+    def key_up(self, key):
+        self.calls.append((self.clock(), (OP_KEY_UP, 0, 0, key)))
+
+    def clear(self):
+        self.calls.clear()
+        self.batches = 0
+
+
+BACKENDS = {
+    PyDirectInputBackend.name: PyDirectInputBackend,
+    PynputBackend.name: PynputBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def create_backend(name=None) -> InjectionBackend:
+    if name is None:
+        name = PyDirectInputBackend.name if sys.platform == "win32" else PynputBackend.name
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown injection backend: {name}") from None
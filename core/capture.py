@@ -0,0 +1,182 @@
+"""Low-overhead capture: OS hook callbacks only fill a preallocated ring.
+
+pynput runs its callbacks inside the OS input hook, so anything slow there
+is input lag for the user (and Windows drops hooks that take too long).
+In ring mode a callback takes one ``perf_counter_ns`` timestamp and writes
+raw fields into a ring buffer; a background thread drains the rings into
+the recorder, where key strings are interned and moves are simplified.
+
+Each listener thread gets its own ring, so every ring has exactly one
+producer and one consumer and needs no lock: the producer publishes a slot
+by advancing ``head`` only after the slot is written.
+"""
+
+import heapq
+import threading
+import time
+from array import array
+
+from core.metrics import LatencyHistogram
+from core.event_store import EV_MOVE, EV_CLICK_DOWN, EV_CLICK_UP, EV_SCROLL, EV_KEY_PRESS, EV_KEY_RELEASE
+
+DEFAULT_RING_CAPACITY = 1 << 16
+DEFAULT_DRAIN_INTERVAL_S = 0.02
+
+
+class RingBuffer:
+    def __init__(self, capacity: int = DEFAULT_RING_CAPACITY):
+        # Round up to a power of two so the slot index is a mask, not a modulo
+        capacity = 1 << max(1, int(capacity) - 1).bit_length()
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.code = array("B", bytes(capacity))
+        self.t = array("q", bytes(capacity * 8))
+        self.x = array("i", bytes(capacity * 4))
+        self.y = array("i", bytes(capacity * 4))
+        self.dx = array("i", bytes(capacity * 4))
+        self.dy = array("i", bytes(capacity * 4))
+        self.raw = [None] * capacity
+        self.head = 0
+        self.tail = 0
+        self.overflows = 0
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def push(self, code, t_ns, x=0, y=0, dx=0, dy=0, raw=None) -> bool:
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.overflows += 1
+            return False
+        i = head & self.mask
+        self.code[i] = code
+        self.t[i] = t_ns
+        self.x[i] = x
+        self.y[i] = y
+        self.dx[i] = dx
+        self.dy[i] = dy
+        self.raw[i] = raw
+        self.head = head + 1
+        return True
+
+    def drain(self):
+        """Take every published slot as a list of (t, code, x, y, dx, dy, raw)."""
+        tail, head, mask = self.tail, self.head, self.mask
+        out = []
+        for n in range(tail, head):
+            i = n & mask
+            out.append((self.t[i], self.code[i], self.x[i], self.y[i], self.dx[i], self.dy[i], self.raw[i]))
+            self.raw[i] = None
+        self.tail = head
+        return out
+
+
+class CaptureStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.overflows = 0
+        self.drained = 0
+
+    def note_callback(self, elapsed_ns):
+        self.latency.record(elapsed_ns)
+
+    @property
+    def callbacks(self):
+        return self.latency.count
+
+    @property
+    def callback_ns_mean(self):
+        return self.latency.mean
+
+    @property
+    def callback_ns_max(self):
+        return self.latency.max
+
+    def as_dict(self):
+        return {
+            "callbacks": self.callbacks,
+            "callback_ns_mean": self.callback_ns_mean,
+            "callback_ns_max": self.callback_ns_max,
+            "overflows": self.overflows,
+            "drained": self.drained,
+        }
+
+
+class RingCapture:
+    """Ring-buffer callbacks for pynput plus the thread that drains them.
+
+    ``sink(code, t_ns, x, y, dx, dy, raw)`` receives events in timestamp
+    order with ``t_ns`` relative to ``start_ns``; ``raw`` is the pynput key
+    or button object (None for moves and scrolls).
+    """
+
+    def __init__(self, sink, start_ns, capacity=DEFAULT_RING_CAPACITY, drain_interval_s=DEFAULT_DRAIN_INTERVAL_S):
+        self.sink = sink
+        self.start_ns = start_ns
+        self.mouse_ring = RingBuffer(capacity)
+        self.keyboard_ring = RingBuffer(capacity)
+        self.drain_interval_s = drain_interval_s
+        self.stats = CaptureStats()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- callbacks (run on the OS hook threads) ---
+
+    def on_move(self, x, y):
+        t = time.perf_counter_ns()
+        self.mouse_ring.push(EV_MOVE, t, int(x), int(y))
+        self.stats.note_callback(time.perf_counter_ns() - t)
+
+    def on_click(self, x, y, button, pressed):
+        t = time.perf_counter_ns()
+        self.mouse_ring.push(EV_CLICK_DOWN if pressed else EV_CLICK_UP, t, int(x), int(y), 0, 0, button)
+        self.stats.note_callback(time.perf_counter_ns() - t)
+
+    def on_scroll(self, x, y, dx, dy):
+        t = time.perf_counter_ns()
+        self.mouse_ring.push(EV_SCROLL, t, int(x), int(y), int(dx), int(dy))
+        self.stats.note_callback(time.perf_counter_ns() - t)
+
+    def on_press(self, key):
+        t = time.perf_counter_ns()
+        self.keyboard_ring.push(EV_KEY_PRESS, t, 0, 0, 0, 0, key)
+        self.stats.note_callback(time.perf_counter_ns() - t)
+
+    def on_release(self, key):
+        t = time.perf_counter_ns()
+        self.keyboard_ring.push(EV_KEY_RELEASE, t, 0, 0, 0, 0, key)
+        self.stats.note_callback(time.perf_counter_ns() - t)
+
+    # --- drain side ---
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="capture-drain", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.drain()
+
+    def _run(self):
+        while not self._stop.wait(self.drain_interval_s):
+            self.drain()
+
+    def drain(self) -> int:
+        mouse_batch = self.mouse_ring.drain()
+        keyboard_batch = self.keyboard_ring.drain()
+        self.stats.overflows = self.mouse_ring.overflows + self.keyboard_ring.overflows
+        if mouse_batch and keyboard_batch:
+            batch = heapq.merge(mouse_batch, keyboard_batch, key=lambda e: e[0])
+        else:
+            batch = mouse_batch or keyboard_batch
+        sink, start_ns = self.sink, self.start_ns
+        count = 0
+        for t_ns, code, x, y, dx, dy, raw in batch:
+            sink(code, t_ns - start_ns, x, y, dx, dy, raw)
+            count += 1
+        self.stats.drained += count
+        return count
@@ -0,0 +1,271 @@
+"""Compressed macro files (.btz): delta + zigzag varint + zlib/lzma chunks.
+
+Layout (all little-endian):
+
+    header   64 bytes   magic, version, codec, chunk size, count, duration,
+                        chunk count, index offset, names offset, geometry offset
+    chunks   one compressed blob per ``chunk_events`` events
+    index    per chunk: offset, compressed length, event count, first t, last t
+    names    same table as .btm
+    geometry same block as .btm (offset 0 = none)
+
+Inside a chunk the event codes come first as raw bytes, then one varint
+stream holding, column after column, the deltas of t, x and y and the raw
+dx, dy and name values, each zigzag-encoded. Deltas restart at zero in
+every chunk, so any chunk decodes on its own: a reader can stream the file
+chunk by chunk or jump straight to the chunk holding a given time.
+
+Encoding and decoding are vectorised with NumPy, imported on first use.
+"""
+
+import lzma
+import os
+import struct
+import zlib
+from bisect import bisect_right
+
+from core.event_store import EventView
+from core.macro_file import pack_geometry, pack_names, unpack_geometry, unpack_names
+
+MAGIC = b"BTZMAC\0\0"
+VERSION = 1
+EXTENSION = ".btz"
+
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+CODECS = {"zlib": CODEC_ZLIB, "lzma": CODEC_LZMA}
+DEFAULT_CHUNK_EVENTS = 4096
+
+HEADER = struct.Struct("<8sHBxIQqIQQQ4x")
+INDEX_ENTRY = struct.Struct("<QIIqq")
+
+# Column order inside a chunk's varint stream; the first three are delta-coded
+_VARINT_COLUMNS = ("t", "x", "y", "dx", "dy", "name")
+_DELTA_COLUMNS = ("t", "x", "y")
+
+
+class CodecError(ValueError):
+    pass
+
+
+def _compress(data: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, 9)
+    if codec == CODEC_LZMA:
+        return lzma.compress(data, format=lzma.FORMAT_RAW, filters=[{"id": lzma.FILTER_LZMA2, "preset": 6}])
+    raise CodecError(f"unknown codec {codec}")
+
+
+def _decompress(data: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    if codec == CODEC_LZMA:
+        return lzma.decompress(data, format=lzma.FORMAT_RAW, filters=[{"id": lzma.FILTER_LZMA2}])
+    raise CodecError(f"unknown codec {codec}")
+
+
+def zigzag_varints(values):
+    """Encode an int64 array as zigzag LEB128 varints; returns a uint8 array."""
+    import numpy as np
+    v = np.asarray(values, dtype=np.int64)
+    zz = ((v << 1) ^ (v >> 63)).astype(np.uint64)
+    if not len(zz):
+        return np.zeros(0, dtype=np.uint8)
+    width = max(1, (int(zz.max()).bit_length() + 6) // 7)
+    shifts = np.arange(width, dtype=np.uint64) * np.uint64(7)
+    groups = (zz[:, None] >> shifts) & np.uint64(0x7F)
+    # Byte k of a value exists if the value needs more than 7k bits
+    present = np.ones((len(zz), width), dtype=bool)
+    present[:, 1:] = zz[:, None] >= (np.uint64(1) << shifts[1:])
+    more = np.zeros_like(present)
+    more[:, :-1] = present[:, 1:]
+    out = groups.astype(np.uint8) | (more.astype(np.uint8) << 7)
+    return out[present]
+
+
+def unzigzag_varints(data, count=None):
+    """Decode zigzag LEB128 varints from a uint8 array; returns int64."""
+    import numpy as np
+    data = np.asarray(data, dtype=np.uint8)
+    last = data < 0x80
+    ends = np.flatnonzero(last)
+    if count is not None and len(ends) != count:
+        raise CodecError(f"expected {count} values, found {len(ends)}")
+    if not len(ends):
+        return np.zeros(0, dtype=np.int64)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    # Position of each byte within its value
+    position = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    parts = (data & 0x7F).astype(np.uint64) << (position.astype(np.uint64) * np.uint64(7))
+    zz = np.add.reduceat(parts, starts)
+    return ((zz >> np.uint64(1)).astype(np.int64)) ^ -((zz & np.uint64(1)).astype(np.int64))
+
+
+def encode_chunk(columns: dict, start: int, stop: int, codec: int) -> bytes:
+    import numpy as np
+    parts = [np.ascontiguousarray(columns["code"][start:stop], dtype=np.uint8).tobytes()]
+    streams = []
+    for name in _VARINT_COLUMNS:
+        col = columns[name][start:stop].astype(np.int64)
+        if name in _DELTA_COLUMNS:
+            col = np.diff(col, prepend=np.int64(0))
+        streams.append(col)
+    parts.append(zigzag_varints(np.concatenate(streams)).tobytes())
+    return _compress(b"".join(parts), codec)
+
+
+def decode_chunk(blob: bytes, count: int, codec: int) -> dict:
+    """Decode one chunk into NumPy columns (same dtypes as core.columns)."""
+    import numpy as np
+    from core.columns import COLUMN_DTYPES
+
+    raw = np.frombuffer(_decompress(blob, codec), dtype=np.uint8)
+    values = unzigzag_varints(raw[count:], count * len(_VARINT_COLUMNS))
+    columns = {"code": raw[:count].copy()}
+    for i, name in enumerate(_VARINT_COLUMNS):
+        col = values[i * count:(i + 1) * count]
+        if name in _DELTA_COLUMNS:
+            col = np.cumsum(col)
+        columns[name] = col
+    dtypes = dict(COLUMN_DTYPES)
+    return {name: columns[name].astype(dtypes[name], copy=False) for name in dtypes}
+
+
+def save_compressed(path, source, codec="zlib", chunk_events=DEFAULT_CHUNK_EVENTS):
+    """Write an EventStore or mapped macro as .btz."""
+    from core.columns import to_columns
+
+    codec_id = CODECS[codec] if isinstance(codec, str) else codec
+    columns = to_columns(source)
+    n = len(columns["code"])
+    tmp_path = f"{path}.tmp"
+    index = []
+    with open(tmp_path, "wb") as f:
+        f.write(bytes(HEADER.size))
+        offset = HEADER.size
+        for start in range(0, n, chunk_events):
+            stop = min(n, start + chunk_events)
+            blob = encode_chunk(columns, start, stop, codec_id)
+            f.write(blob)
+            t = columns["t"]
+            index.append(INDEX_ENTRY.pack(offset, len(blob), stop - start, int(t[start]), int(t[stop - 1])))
+            offset += len(blob)
+
+        index_offset = offset
+        f.write(b"".join(index))
+        names_offset = index_offset + len(index) * INDEX_ENTRY.size
+        names_blob = pack_names(source.names)
+        f.write(names_blob)
+        geometry = getattr(source, "geometry", None) or ()
+        geometry_offset = names_offset + len(names_blob) if geometry else 0
+        if geometry:
+            f.write(pack_geometry(geometry))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, codec_id, chunk_events, n, source.duration_ns(), len(index),
+                            index_offset, names_offset, geometry_offset))
+    os.replace(tmp_path, path)
+
+
+def load_compressed(path):
+    return CompressedMacro(path)
+
+
+class CompressedMacro:
+    """Read side of .btz; decodes chunks on demand and keeps the last one."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            header = self._file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise CodecError(f"{path} is too short to be a compressed macro")
+            (magic, version, self.codec, self.chunk_events, self._count, self._duration_ns, chunk_count,
+             index_offset, names_offset, geometry_offset) = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise CodecError(f"{path} is not a compressed BetterTask macro")
+            if version != VERSION:
+                raise CodecError(f"{path} uses unsupported format version {version}")
+            self._file.seek(index_offset)
+            index = self._file.read(chunk_count * INDEX_ENTRY.size)
+            if len(index) < chunk_count * INDEX_ENTRY.size:
+                raise CodecError(f"{path} is truncated")
+            self.index = [INDEX_ENTRY.unpack_from(index, i * INDEX_ENTRY.size) for i in range(chunk_count)]
+            # Names and geometry are the (small) tail of the file
+            self._file.seek(names_offset)
+            tail = self._file.read()
+            _, self.names = unpack_names(tail)
+            self.geometry = unpack_geometry(tail, geometry_offset - names_offset) if geometry_offset else None
+        except (CodecError, struct.error) as e:
+            self._file.close()
+            raise CodecError(str(e)) from e
+        self.version = version
+        # First event index of each chunk, and first timestamp, for bisecting
+        self._starts = []
+        total = 0
+        for _, _, count, _, _ in self.index:
+            self._starts.append(total)
+            total += count
+        self._first_t = [entry[3] for entry in self.index]
+        self._cached = (None, None)
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def chunk_count(self):
+        return len(self.index)
+
+    def chunk(self, i: int) -> dict:
+        """NumPy columns of chunk ``i``, decoded on its own."""
+        if self._cached[0] == i:
+            return self._cached[1]
+        offset, length, count, _, _ = self.index[i]
+        self._file.seek(offset)
+        columns = decode_chunk(self._file.read(length), count, self.codec)
+        self._cached = (i, columns)
+        return columns
+
+    def chunks(self):
+        for i in range(len(self.index)):
+            yield self.chunk(i)
+
+    def chunk_at_time(self, t_ns: int) -> int:
+        """Index of the chunk holding the first event at or after ``t_ns``."""
+        i = max(0, bisect_right(self._first_t, t_ns) - 1)
+        if i < len(self.index) - 1 and self.index[i][4] < t_ns:
+            i += 1
+        return i
+
+    def record(self, i: int):
+        if not 0 <= i < self._count:
+            raise IndexError("record index out of range")
+        chunk = bisect_right(self._starts, i) - 1
+        columns = self.chunk(chunk)
+        j = i - self._starts[chunk]
+        return tuple(int(columns[name][j]) for name in ("code", "t", "x", "y", "dx", "dy", "name"))
+
+    def records(self):
+        for columns in self.chunks():
+            yield from zip(*(columns[name].tolist() for name in ("code", "t", "x", "y", "dx", "dy", "name")))
+
+    def duration_ns(self) -> int:
+        return self._duration_ns
+
+    def view(self):
+        return EventView(self)
+
+    def to_store(self):
+        from core.columns import from_columns, to_columns
+        return from_columns(to_columns(self), self.names, self.geometry)
@@ -0,0 +1,45 @@
+"""NumPy views of event columns for bulk (vectorised) processing.
+
+Kept separate from ``core.event_store`` so that recording and playback never
+pay for importing NumPy; only offline tools import this module.
+"""
+
+import numpy as np
+
+from core.event_store import EventStore
+
+COLUMN_DTYPES = (
+    ("code", np.uint8),
+    ("t", np.int64),
+    ("x", np.int32),
+    ("y", np.int32),
+    ("dx", np.int32),
+    ("dy", np.int32),
+    ("name", np.uint16),
+)
+
+# Matches core.macro_file.RECORD ("<BqiiiiH"), packed with no padding
+RECORD_DTYPE = np.dtype([(name, np.dtype(dtype).newbyteorder("<")) for name, dtype in COLUMN_DTYPES])
+
+
+def to_columns(source) -> dict:
+    """Copy the events of an EventStore, mapped or compressed macro into NumPy arrays."""
+    n = len(source)
+    if isinstance(source, EventStore):
+        return {name: np.frombuffer(getattr(source, name), dtype=dtype, count=n).copy()
+                for name, dtype in COLUMN_DTYPES}
+    if hasattr(source, "record_buffer"):
+        records = np.frombuffer(source.record_buffer(), dtype=RECORD_DTYPE, count=n)
+        return {name: records[name].astype(dtype) for name, dtype in COLUMN_DTYPES}
+    if hasattr(source, "chunks"):
+        # Compressed macro: each chunk already decodes to columns
+        parts = list(source.chunks())
+        return {name: np.concatenate([p[name] for p in parts]) if parts else np.zeros(0, dtype=dtype)
+                for name, dtype in COLUMN_DTYPES}
+    raise TypeError(f"cannot read columns from {type(source).__name__}")
+
+
+def from_columns(columns: dict, names, geometry=None) -> EventStore:
+    n = len(columns["code"])
+    buffers = {name: np.ascontiguousarray(columns[name], dtype=dtype).tobytes() for name, dtype in COLUMN_DTYPES}
+    return EventStore.from_buffers(buffers, names, n, geometry)
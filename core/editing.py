@@ -0,0 +1,208 @@
+"""Bulk macro editing on NumPy event columns.
+
+Every operation works on whole columns at once (masks, slices, fancy
+indexing and arithmetic) and returns a new ``EditableMacro``; nothing loops
+over events in Python, so editing a multi-million-event macro takes
+milliseconds. Times are nanoseconds on the macro's own timeline and ranges
+are half-open, ``[start_ns, end_ns)``.
+
+Edits work on events, not on input state: cutting away a key release
+leaves that key pressed for the rest of the macro, as it would in the
+recording.
+"""
+
+import numpy as np
+
+from core.columns import COLUMN_DTYPES, from_columns, to_columns
+from core.event_store import EV_CLICK_DOWN, EV_CLICK_UP, EV_MOVE, EV_SCROLL, EVENT_TYPES
+
+# Event codes that carry a pointer position
+POINTER_CODES = (EV_MOVE, EV_CLICK_DOWN, EV_CLICK_UP, EV_SCROLL)
+_CODES_BY_NAME = {"click_down": (EV_CLICK_DOWN,), "click_up": (EV_CLICK_UP,)}
+for _code, _name in EVENT_TYPES.items():
+    _CODES_BY_NAME[_name] = _CODES_BY_NAME.get(_name, ()) + (_code,)
+
+
+def event_codes(types) -> tuple:
+    """Event codes for type names ("move", "click", "key_press", ...) or codes."""
+    codes = []
+    for kind in types:
+        if isinstance(kind, str):
+            if kind not in _CODES_BY_NAME:
+                raise ValueError(f"Unknown event type {kind!r}; choose from {', '.join(sorted(_CODES_BY_NAME))}")
+            codes.extend(_CODES_BY_NAME[kind])
+        else:
+            codes.append(int(kind))
+    return tuple(sorted(set(codes)))
+
+
+class EditableMacro:
+    def __init__(self, columns: dict, names, geometry=None):
+        self.columns = columns
+        self.names = list(names)
+        self.geometry = geometry
+
+    @classmethod
+    def from_source(cls, source):
+        """Columns of an EventStore, mapped or compressed macro, or an EditableMacro."""
+        if isinstance(source, EditableMacro):
+            return source
+        return cls(to_columns(source), source.names, getattr(source, "geometry", None))
+
+    def __len__(self):
+        return len(self.columns["t"])
+
+    def duration_ns(self) -> int:
+        t = self.columns["t"]
+        return int(t[-1]) if len(t) else 0
+
+    def to_store(self):
+        return from_columns(self.columns, self.names, self.geometry)
+
+    def _replace(self, columns, names=None):
+        return EditableMacro(columns, self.names if names is None else names, self.geometry)
+
+    def _select(self, mask_or_index):
+        return self._replace({name: col[mask_or_index] for name, col in self.columns.items()})
+
+    def _span(self, start_ns, end_ns):
+        t = self.columns["t"]
+        lo = 0 if start_ns is None else int(np.searchsorted(t, start_ns, "left"))
+        hi = len(t) if end_ns is None else int(np.searchsorted(t, end_ns, "left"))
+        return lo, max(lo, hi)
+
+    @staticmethod
+    def _check_range(start_ns, end_ns):
+        if end_ns is not None and start_ns is not None and end_ns < start_ns:
+            raise ValueError(f"Range ends ({end_ns} ns) before it starts ({start_ns} ns)")
+
+    def _with_t(self, t):
+        columns = dict(self.columns)
+        columns["t"] = t
+        return self._replace(columns)
+
+    # -- time -------------------------------------------------------------
+
+    def trim(self, start_ns=0, end_ns=None):
+        """Keep only ``[start_ns, end_ns)``, moved to start at 0."""
+        self._check_range(start_ns, end_ns)
+        lo, hi = self._span(start_ns, end_ns)
+        trimmed = self._select(slice(lo, hi))
+        trimmed.columns["t"] = trimmed.columns["t"] - int(start_ns or 0)
+        return trimmed
+
+    def cut(self, start_ns, end_ns):
+        """Remove ``[start_ns, end_ns)`` and close the gap it leaves."""
+        self._check_range(start_ns, end_ns)
+        lo, hi = self._span(start_ns, end_ns)
+        index = np.r_[0:lo, hi:len(self)]
+        cut = self._select(index)
+        cut.columns["t"][lo:] -= int(end_ns) - int(start_ns)
+        return cut
+
+    def shift(self, at_ns, delta_ns):
+        """Move every event at or after ``at_ns`` by ``delta_ns`` (insert or remove a pause)."""
+        lo, _ = self._span(at_ns, None)
+        t = self.columns["t"].copy()
+        t[lo:] += int(delta_ns)
+        if delta_ns < 0 and lo and lo < len(t) and t[lo] < t[lo - 1]:
+            raise ValueError(f"Shifting by {delta_ns} ns would move events before earlier ones")
+        if len(t) and t[0] < 0:
+            raise ValueError(f"Shifting by {delta_ns} ns would move events before the start")
+        return self._with_t(t)
+
+    def stretch(self, start_ns, end_ns, factor: float):
+        """Scale time inside ``[start_ns, end_ns)`` by ``factor``; later events move to match."""
+        if factor <= 0:
+            raise ValueError(f"Stretch factor must be positive, got {factor}")
+        self._check_range(start_ns, end_ns)
+        lo, hi = self._span(start_ns, end_ns)
+        t = self.columns["t"].copy()
+        t[lo:hi] = start_ns + np.rint((t[lo:hi] - start_ns) * factor).astype(np.int64)
+        t[hi:] += int(round((end_ns - start_ns) * factor)) - (end_ns - start_ns)
+        return self._with_t(t)
+
+    # -- combining --------------------------------------------------------
+
+    def _adopt_names(self, other):
+        """Our name table extended with ``other``'s, and ``other``'s name column mapped onto it."""
+        names = list(self.names)
+        lookup = {text: i for i, text in enumerate(names)}
+        mapping = np.empty(max(1, len(other.names)), dtype=np.uint16)
+        for i, text in enumerate(other.names):
+            if text not in lookup:
+                lookup[text] = len(names)
+                names.append(text)
+            mapping[i] = lookup[text]
+        if len(names) > 0xFFFF:
+            raise ValueError("Combined macro has too many distinct key/button names")
+        return names, mapping[other.columns["name"]]
+
+    def splice(self, at_ns, other, gap_ns=0):
+        """Insert ``other`` at ``at_ns``; events from ``at_ns`` on move later to make room."""
+        other = EditableMacro.from_source(other)
+        names, other_names = self._adopt_names(other)
+        lo, _ = self._span(at_ns, None)
+        room = other.duration_ns() + int(gap_ns)
+        columns = {}
+        for name, _ in COLUMN_DTYPES:
+            ours, theirs = self.columns[name], other.columns[name]
+            if name == "t":
+                ours, theirs = ours.copy(), theirs + int(at_ns)
+                ours[lo:] += room
+            elif name == "name":
+                theirs = other_names
+            columns[name] = np.concatenate((ours[:lo], theirs.astype(ours.dtype), ours[lo:]))
+        return self._replace(columns, names)
+
+    def concat(self, *others, gap_ns=0):
+        """Append ``others`` one after the other, ``gap_ns`` apart."""
+        result = self
+        for other in others:
+            result = result.splice(result.duration_ns() + int(gap_ns), other)
+        return result
+
+    # -- space ------------------------------------------------------------
+
+    def _pointer_mask(self, start_ns, end_ns):
+        mask = np.isin(self.columns["code"], POINTER_CODES)
+        if start_ns is not None or end_ns is not None:
+            lo, hi = self._span(start_ns, end_ns)
+            mask[:lo] = False
+            mask[hi:] = False
+        return mask
+
+    def translate(self, dx, dy, start_ns=None, end_ns=None):
+        """Move pointer events by ``(dx, dy)`` pixels."""
+        mask = self._pointer_mask(start_ns, end_ns)
+        columns = dict(self.columns)
+        for name, offset in (("x", dx), ("y", dy)):
+            col = self.columns[name]
+            columns[name] = np.add(col, np.int32(offset), out=col.copy(), where=mask)
+        return self._replace(columns)
+
+    def scale(self, sx, sy=None, origin=(0, 0), start_ns=None, end_ns=None):
+        """Scale pointer positions about ``origin``; scroll amounts are left alone."""
+        sy = sx if sy is None else sy
+        ox, oy = origin
+        mask = self._pointer_mask(start_ns, end_ns)
+        columns = dict(self.columns)
+        for name, factor, o in (("x", sx, ox), ("y", sy, oy)):
+            col = self.columns[name]
+            scaled = (col - float(o)) * float(factor) + float(o)
+            out = col.copy()
+            np.copyto(out, np.rint(scaled), casting="unsafe", where=mask)
+            columns[name] = out
+        return self._replace(columns)
+
+    # -- selection --------------------------------------------------------
+
+    def filter(self, keep=None, drop=None):
+        """Keep only the event types in ``keep`` and/or remove those in ``drop``."""
+        code = self.columns["code"]
+        mask = np.ones(len(code), dtype=bool)
+        if keep is not None:
+            mask &= np.isin(code, event_codes(keep))
+        if drop is not None:
+            mask &= ~np.isin(code, event_codes(drop))
+        return self._select(mask)
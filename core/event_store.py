@@ -0,0 +1,185 @@
+"""Compact, column-oriented storage for recorded input events.
+
+Every event is spread over seven typed parallel arrays instead of living in
+its own dict:
+
+    code   uint8   event type (see the EV_* constants)
+    t      int64   nanoseconds since the start of the recording
+    x, y   int32   cursor position
+    dx, dy int32   scroll delta (zero for everything else)
+    name   uint16  index into ``names`` for the key / button string
+
+That is 27 bytes per event. Columns grow by doubling, so a store holds at
+most 2x that while it is still growing (54 bytes worst case). For
+comparison the old list-of-dicts layout cost about 550 bytes per "move"
+event (dict + four tuples + float + list slot) and about 270 bytes per key
+event, measured recursively with ``sys.getsizeof`` on CPython 3.11. An hour
+of 1000 Hz mouse movement drops from ~2.0 GB to ~100 MB.
+"""
+
+from array import array
+from collections.abc import Sequence
+
+EV_MOVE = 0
+EV_CLICK_DOWN = 1
+EV_CLICK_UP = 2
+EV_SCROLL = 3
+EV_KEY_PRESS = 4
+EV_KEY_RELEASE = 5
+
+EVENT_TYPES = {
+    EV_MOVE: "move",
+    EV_CLICK_DOWN: "click",
+    EV_CLICK_UP: "click",
+    EV_SCROLL: "scroll",
+    EV_KEY_PRESS: "key_press",
+    EV_KEY_RELEASE: "key_release",
+}
+
+NO_NAME = 0
+NS_PER_SECOND = 1_000_000_000
+
+_COLUMNS = (("code", "B"), ("t", "q"), ("x", "i"), ("y", "i"), ("dx", "i"), ("dy", "i"), ("name", "H"))
+BYTES_PER_EVENT = sum(array(tc).itemsize for _, tc in _COLUMNS)
+
+
+class EventStore:
+    def __init__(self, capacity: int = 1024):
+        capacity = max(1, int(capacity))
+        self.code = array("B", bytes(capacity))
+        self.t = array("q", bytes(capacity * 8))
+        self.x = array("i", bytes(capacity * 4))
+        self.y = array("i", bytes(capacity * 4))
+        self.dx = array("i", bytes(capacity * 4))
+        self.dy = array("i", bytes(capacity * 4))
+        self.name = array("H", bytes(capacity * 2))
+        # Slot 0 is reserved for "no key / button" so the column can stay zeroed
+        self.names = [""]
+        self._name_ids = {"": NO_NAME}
+        self._size = 0
+        self._capacity = capacity
+        # Monitor rects ((x, y, width, height), ...) the events were captured on
+        self.geometry = None
+
+    @classmethod
+    def from_buffers(cls, buffers: dict, names, count: int, geometry=None):
+        """Build a store around raw column bytes (e.g. from NumPy arrays)."""
+        store = cls()
+        store.geometry = geometry
+        if count:
+            for column, typecode in _COLUMNS:
+                col = array(typecode)
+                col.frombytes(buffers[column])
+                setattr(store, column, col)
+            store._size = store._capacity = count
+        store.names = list(names) or [""]
+        store._name_ids = {text: i for i, text in enumerate(store.names)}
+        return store
+
+    def __len__(self):
+        return self._size
+
+    def empty_like(self, capacity: int = 1024):
+        """An empty store sharing this one's name table and geometry."""
+        store = EventStore(capacity)
+        store.names, store._name_ids = self.names, self._name_ids
+        store.geometry = self.geometry
+        return store
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def nbytes(self):
+        return self._capacity * BYTES_PER_EVENT
+
+    def intern(self, text: str) -> int:
+        name_id = self._name_ids.get(text)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(text)
+            self._name_ids[text] = name_id
+        return name_id
+
+    def _grow(self):
+        # Double every column in place; array.frombytes reallocates once per column
+        for column, _ in _COLUMNS:
+            col = getattr(self, column)
+            col.frombytes(bytes(self._capacity * col.itemsize))
+        self._capacity *= 2
+
+    def append(self, code: int, t_ns: int, x: int = 0, y: int = 0, dx: int = 0, dy: int = 0, name: int = NO_NAME):
+        i = self._size
+        if i == self._capacity:
+            self._grow()
+        self.code[i] = code
+        self.t[i] = t_ns
+        self.x[i] = x
+        self.y[i] = y
+        self.dx[i] = dx
+        self.dy[i] = dy
+        self.name[i] = name
+        self._size = i + 1
+
+    def clear(self):
+        self._size = 0
+
+    def record(self, i: int):
+        return (self.code[i], self.t[i], self.x[i], self.y[i], self.dx[i], self.dy[i], self.name[i])
+
+    def records(self):
+        n = self._size
+        return zip(self.code[:n], self.t[:n], self.x[:n], self.y[:n], self.dx[:n], self.dy[:n], self.name[:n])
+
+    def duration_ns(self) -> int:
+        return self.t[self._size - 1] if self._size else 0
+
+    def view(self):
+        return EventView(self)
+
+
+class EventView(Sequence):
+    """Read-only view that presents a store as the old list of event dicts.
+
+    Dicts are built on access only, so ``len()`` and slicing stay cheap and
+    nothing is materialised unless a caller actually indexes into the view.
+    """
+
+    def __init__(self, store: EventStore):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        n = len(self.store)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("event index out of range")
+        return event_dict(self.store, index)
+
+    def __iter__(self):
+        store = self.store
+        for i in range(len(store)):
+            yield event_dict(store, i)
+
+
+def event_dict(store: EventStore, i: int) -> dict:
+    code, t_ns, x, y, dx, dy, name = store.record(i)
+    event = {"type": EVENT_TYPES.get(code, "unknown"), "time": t_ns / NS_PER_SECOND}
+    if code == EV_MOVE:
+        event["position"] = (x, y)
+    elif code in (EV_CLICK_DOWN, EV_CLICK_UP):
+        event["position"] = (x, y)
+        event["button"] = store.names[name]
+        event["pressed"] = code == EV_CLICK_DOWN
+    elif code == EV_SCROLL:
+        event["position"] = (x, y)
+        event["delta"] = (dx, dy)
+    else:
+        event["key"] = store.names[name]
+    return event
@@ -0,0 +1,90 @@
+"""Open and write macros by file extension.
+
+    .btm   binary macro (core.macro_file), memory-mapped on open
+    .btz   compressed chunked macro (core.codec), decoded a chunk at a time
+    .json  list of event dicts in the original in-memory shape
+"""
+
+import json
+import os
+from collections import Counter
+
+from core.event_store import (
+    EventStore, NS_PER_SECOND, EVENT_TYPES,
+    EV_MOVE, EV_CLICK_DOWN, EV_CLICK_UP, EV_SCROLL, EV_KEY_PRESS, EV_KEY_RELEASE,
+)
+from core.macro_file import EXTENSION as BTM_EXTENSION, load_macro, save_macro
+
+JSON_EXTENSION = ".json"
+BTZ_EXTENSION = ".btz"
+
+
+def store_from_events(events) -> EventStore:
+    """Build an EventStore from event dicts (the pre-EventStore format)."""
+    store = EventStore(capacity=max(1, len(events)))
+    for event in events:
+        etype = event["type"]
+        t_ns = int(event["time"] * NS_PER_SECOND)
+        x, y = (int(v) for v in event.get("position") or (0, 0))
+        if etype == "move":
+            store.append(EV_MOVE, t_ns, x, y)
+        elif etype in ("click", "click_release"):
+            code = EV_CLICK_DOWN if event.get("pressed") else EV_CLICK_UP
+            store.append(code, t_ns, x, y, name=store.intern(str(event["button"])))
+        elif etype == "scroll":
+            dx, dy = event["delta"]
+            store.append(EV_SCROLL, t_ns, x, y, int(dx), int(dy))
+        elif etype in ("key_press", "key_release"):
+            code = EV_KEY_PRESS if etype == "key_press" else EV_KEY_RELEASE
+            store.append(code, t_ns, name=store.intern(str(event["key"])))
+    if events and "geometry" in events[0]:
+        store.geometry = tuple(tuple(rect) for rect in events[0]["geometry"])
+    return store
+
+
+def event_histogram(source) -> dict:
+    """Event count per type name; clicks are split into click_down / click_up."""
+    counts = Counter(code for code, *_ in source.records())
+    histogram = {}
+    for code, count in sorted(counts.items()):
+        if code == EV_CLICK_DOWN:
+            name = "click_down"
+        elif code == EV_CLICK_UP:
+            name = "click_up"
+        else:
+            name = EVENT_TYPES.get(code, "unknown")
+        histogram[name] = histogram.get(name, 0) + count
+    return histogram
+
+
+def open_macro(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == BTZ_EXTENSION:
+        from core.codec import load_compressed
+        return load_compressed(path)
+    if ext == JSON_EXTENSION:
+        with open(path, "r", encoding="utf-8") as f:
+            store = store_from_events(json.load(f))
+        # Like mapped and compressed macros, remember where it came from
+        store.path = path
+        return store
+    return load_macro(path)
+
+
+def write_macro(path, source, codec="zlib"):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == JSON_EXTENSION:
+        events = list(source.view())
+        if events and getattr(source, "geometry", None):
+            events[0]["geometry"] = [list(rect) for rect in source.geometry]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(events, f)
+        os.replace(tmp_path, path)
+    elif ext == BTM_EXTENSION:
+        save_macro(path, source)
+    elif ext == BTZ_EXTENSION:
+        from core.codec import save_compressed
+        save_compressed(path, source, codec)
+    else:
+        raise ValueError(f"Unknown macro format: {ext or path}")
@@ -0,0 +1,200 @@
+"""Macro library: an SQLite index over a directory of macro files.
+
+Listing, sorting and searching read only the index. ``scan()`` brings it up
+to date incrementally: a file is opened (and hashed) only if it is new or
+its mtime/size differs from what was indexed, and rows for files that have
+disappeared are dropped along with their tags and run statistics. Tags and
+run statistics live only in the index and survive a file being re-indexed.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from core.formats import BTZ_EXTENSION, JSON_EXTENSION, event_histogram, open_macro
+from core.macro_file import EXTENSION as BTM_EXTENSION
+from utils.paths import app_data_dir
+
+MACRO_EXTENSIONS = (BTM_EXTENSION, BTZ_EXTENSION, JSON_EXTENSION)
+SORT_COLUMNS = ("name", "duration_ns", "events", "mtime_ns", "last_run_at", "run_count")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS macros (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    duration_ns INTEGER NOT NULL,
+    events INTEGER NOT NULL,
+    histogram TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    path TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (path, tag)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    path TEXT PRIMARY KEY,
+    run_count INTEGER NOT NULL DEFAULT 0,
+    loops INTEGER NOT NULL DEFAULT 0,
+    last_run_at REAL,
+    last_lateness_p99_ns INTEGER,
+    last_loop_ms REAL
+);
+CREATE INDEX IF NOT EXISTS macros_name ON macros (name);
+CREATE INDEX IF NOT EXISTS tags_tag ON tags (tag);
+"""
+
+# One row per macro with its run stats and comma-joined tags
+_SELECT = (
+    "SELECT m.*, COALESCE(r.run_count, 0) AS run_count, r.loops, r.last_run_at, r.last_lateness_p99_ns, "
+    "r.last_loop_ms, (SELECT group_concat(tag, ',') FROM tags t WHERE t.path = m.path) AS tags "
+    "FROM macros m LEFT JOIN runs r ON r.path = m.path"
+)
+
+
+def file_hash(path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MacroLibrary:
+    def __init__(self, root=None, index_path=None):
+        self.root = os.path.abspath(root or app_data_dir("macros"))
+        os.makedirs(self.root, exist_ok=True)
+        self.index_path = index_path or os.path.join(self.root, "library.sqlite3")
+        # The GUI touches the library from its own thread and playback threads;
+        # one connection shared under a lock
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(self.index_path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(_SCHEMA)
+        # Files that failed to open, by (mtime_ns, size), so scan() doesn't retry them until they change
+        self._unreadable = {}
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    def scan(self) -> dict:
+        """Re-index changed files under ``root``; returns added/updated/removed counts."""
+        with self._lock:
+            indexed = {row["path"]: (row["mtime_ns"], row["size"])
+                       for row in self.db.execute("SELECT path, mtime_ns, size FROM macros")}
+        seen = set()
+        added = updated = failed = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if os.path.splitext(filename)[1].lower() not in MACRO_EXTENSIONS:
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                seen.add(path)
+                previous = indexed.get(path)
+                stamp = (st.st_mtime_ns, st.st_size)
+                if previous == stamp or self._unreadable.get(path) == stamp:
+                    continue
+                if not self._index(path, st):
+                    self._unreadable[path] = stamp
+                    failed += 1
+                elif previous is None:
+                    added += 1
+                else:
+                    updated += 1
+        gone = [path for path in indexed if path not in seen]
+        with self._lock, self.db:
+            # Tags and run history go with the file, so a new file at the same path starts clean
+            for table in ("macros", "tags", "runs"):
+                self.db.executemany(f"DELETE FROM {table} WHERE path = ?", ((p,) for p in gone))
+        return {"added": added, "updated": updated, "removed": len(gone), "failed": failed}
+
+    def add(self, path) -> bool:
+        """Index one file now, e.g. right after saving it."""
+        path = os.path.abspath(path)
+        return self._index(path, os.stat(path))
+
+    def _index(self, path, st) -> bool:
+        try:
+            macro = open_macro(path)
+            try:
+                row = (path, os.path.splitext(os.path.basename(path))[0], st.st_mtime_ns, st.st_size,
+                       macro.duration_ns(), len(macro), json.dumps(event_histogram(macro)), file_hash(path))
+            finally:
+                close = getattr(macro, "close", None)
+                if close is not None:
+                    close()
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Skipping unreadable macro {path}: {e}")
+            return False
+        with self._lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO macros VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+        return True
+
+    def list(self, search=None, tag=None, sort="name", descending=False, limit=None) -> list:
+        """Index rows as dicts; ``search`` matches name or tag substrings."""
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort!r}; choose one of {', '.join(SORT_COLUMNS)}")
+        query = [_SELECT, "WHERE 1"]
+        params = []
+        if search:
+            query.append("AND (m.name LIKE ? OR EXISTS "
+                         "(SELECT 1 FROM tags t WHERE t.path = m.path AND t.tag LIKE ?))")
+            params += [f"%{search}%"] * 2
+        if tag:
+            query.append("AND EXISTS (SELECT 1 FROM tags t WHERE t.path = m.path AND t.tag = ?)")
+            params.append(tag)
+        query.append(f"ORDER BY {sort} {'DESC' if descending else 'ASC'}, m.name")
+        if limit:
+            query.append("LIMIT ?")
+            params.append(int(limit))
+        with self._lock:
+            rows = self.db.execute(" ".join(query), params).fetchall()
+        return [self._row(row) for row in rows]
+
+    def get(self, path):
+        with self._lock:
+            row = self.db.execute(f"{_SELECT} WHERE m.path = ?", (os.path.abspath(path),)).fetchone()
+        return self._row(row) if row is not None else None
+
+    @staticmethod
+    def _row(row) -> dict:
+        entry = dict(row)
+        entry["histogram"] = json.loads(entry["histogram"])
+        entry["tags"] = sorted(entry["tags"].split(",")) if entry["tags"] else []
+        return entry
+
+    def tag(self, path, *tags):
+        path = os.path.abspath(path)
+        with self._lock, self.db:
+            self.db.executemany("INSERT OR IGNORE INTO tags VALUES (?, ?)", ((path, t.strip()) for t in tags if t.strip()))
+
+    def untag(self, path, *tags):
+        path = os.path.abspath(path)
+        with self._lock, self.db:
+            self.db.executemany("DELETE FROM tags WHERE path = ? AND tag = ?", ((path, t) for t in tags))
+
+    def record_run(self, path, loops, metrics=None):
+        """Add a finished playback session to the macro's run stats."""
+        snapshot = metrics.snapshot() if metrics is not None else {}
+        lateness = snapshot.get("lateness") or {}
+        loop_wall = snapshot.get("loop_wall") or {}
+        p99 = lateness.get("p99_ns")
+        loop_ms = loop_wall.get("mean_ns") / 1e6 if loop_wall.get("mean_ns") is not None else None
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT INTO runs (path, run_count, loops, last_run_at, last_lateness_p99_ns, last_loop_ms) "
+                "VALUES (?, 1, ?, ?, ?, ?) ON CONFLICT(path) DO UPDATE SET run_count = run_count + 1, "
+                "loops = loops + excluded.loops, last_run_at = excluded.last_run_at, "
+                "last_lateness_p99_ns = COALESCE(excluded.last_lateness_p99_ns, last_lateness_p99_ns), "
+                "last_loop_ms = COALESCE(excluded.last_loop_ms, last_loop_ms)",
+                (os.path.abspath(path), int(loops), time.time(), p99, loop_ms))
@@ -0,0 +1,202 @@
+"""Versioned binary macro files (.btm).
+
+Layout (all little-endian):
+
+    header   64 bytes   magic, version, record size, count, duration,
+                        names offset, geometry offset (v2+, 0 = none)
+    records  count * 27 bytes, one fixed-width record per event
+    names    u32 count, then u16 length + UTF-8 bytes per key/button string
+    geometry u16 count, then (x, y, width, height) as i32 per monitor the
+             macro was recorded on (v2+)
+
+Version 1 files (no geometry) still load; they play back unscaled.
+
+Records use the same field order as ``EventStore.records()`` so a mapped
+file and an in-memory store can be played back by the same code. Opening a
+file only reads the header and the (tiny) string table; the records stay in
+the memory map and are unpacked as they are iterated.
+"""
+
+import mmap
+import os
+import struct
+
+from core.event_store import EventStore, EventView
+
+MAGIC = b"BTMACRO\0"
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+EXTENSION = ".btm"
+
+HEADER = struct.Struct("<8sHHQqQQ20x")
+RECORD = struct.Struct("<BqiiiiH")
+_NAME_COUNT = struct.Struct("<I")
+_NAME_LEN = struct.Struct("<H")
+_MONITOR_COUNT = struct.Struct("<H")
+_MONITOR = struct.Struct("<iiii")
+
+
+class MacroFormatError(ValueError):
+    pass
+
+
+def pack_names(names, lead=None) -> bytes:
+    """u32 ``lead`` (default: the name count), then u16 length + UTF-8 per name."""
+    parts = [_NAME_COUNT.pack(len(names) if lead is None else lead)]
+    for text in names:
+        raw = text.encode("utf-8")
+        parts.append(_NAME_LEN.pack(len(raw)))
+        parts.append(raw)
+    return b"".join(parts)
+
+
+def unpack_names(buffer, offset=0, end=None):
+    """Read what pack_names wrote at ``offset``; returns (lead, names).
+
+    Reads ``lead`` names, or every name up to ``end`` when it is given.
+    """
+    (lead,) = _NAME_COUNT.unpack_from(buffer, offset)
+    offset += _NAME_COUNT.size
+    names = []
+    while (offset < end) if end is not None else (len(names) < lead):
+        (length,) = _NAME_LEN.unpack_from(buffer, offset)
+        offset += _NAME_LEN.size
+        names.append(bytes(buffer[offset:offset + length]).decode("utf-8"))
+        offset += length
+    return lead, names
+
+
+def pack_geometry(geometry) -> bytes:
+    """u16 monitor count, then (x, y, width, height) as i32 per monitor."""
+    return _MONITOR_COUNT.pack(len(geometry)) + b"".join(_MONITOR.pack(*rect) for rect in geometry)
+
+
+def unpack_geometry(buffer, offset=0) -> tuple:
+    (count,) = _MONITOR_COUNT.unpack_from(buffer, offset)
+    offset += _MONITOR_COUNT.size
+    return tuple(_MONITOR.unpack_from(buffer, offset + i * _MONITOR.size) for i in range(count))
+
+
+def save_macro(path, source):
+    """Write an EventStore (or anything with records()/names) to ``path``."""
+    records = bytearray(len(source) * RECORD.size)
+    pack_into = RECORD.pack_into
+    offset = 0
+    for rec in source.records():
+        pack_into(records, offset, *rec)
+        offset += RECORD.size
+    write_macro_records(path, [records], source.names, getattr(source, "geometry", None))
+
+
+def write_macro_records(path, blobs, names, geometry=None):
+    """Write a macro from already-packed RECORD bytes, one blob at a time.
+
+    Only one blob is held at once, so a macro of any length can be written
+    from a stream. ``names`` is read after the last blob has been consumed,
+    so a generator may still be filling it in while the records are written.
+    The duration is the last record's timestamp.
+    """
+    # Write next to the target and rename so a crash never leaves half a macro
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(bytes(HEADER.size))
+        size = 0
+        last = None
+        for blob in blobs:
+            if blob:
+                f.write(blob)
+                size += len(blob)
+                last = blob
+        count = size // RECORD.size
+        duration_ns = RECORD.unpack_from(last, len(last) - RECORD.size)[1] if count else 0
+
+        names_blob = pack_names(names)
+        f.write(names_blob)
+
+        names_offset = HEADER.size + size
+        geometry = geometry or ()
+        geometry_offset = names_offset + len(names_blob) if geometry else 0
+        if geometry:
+            f.write(pack_geometry(geometry))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, count, duration_ns, names_offset, geometry_offset))
+    os.replace(tmp_path, path)
+
+
+def load_macro(path):
+    return MappedMacro(path)
+
+
+class MappedMacro:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise MacroFormatError(f"{path} is empty")
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise MacroFormatError(f"{path} is too short to be a macro file")
+        magic, version, record_size, count, duration_ns, names_offset, geometry_offset = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise MacroFormatError(f"{path} is not a BetterTask macro")
+        if version not in SUPPORTED_VERSIONS or record_size != RECORD.size:
+            self.close()
+            raise MacroFormatError(f"{path} uses unsupported format version {version}")
+        if names_offset != HEADER.size + count * RECORD.size or names_offset > len(self._map):
+            self.close()
+            raise MacroFormatError(f"{path} is truncated")
+
+        self.version = version
+        self._count = count
+        self._duration_ns = duration_ns
+        _, self.names = unpack_names(self._map, names_offset)
+        # v1 headers had zero padding where the geometry offset now lives
+        self.geometry = unpack_geometry(self._map, geometry_offset) if geometry_offset else None
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def record(self, i: int):
+        if not 0 <= i < self._count:
+            raise IndexError("record index out of range")
+        return RECORD.unpack_from(self._map, HEADER.size + i * RECORD.size)
+
+    def records(self):
+        # iter_unpack walks the mapped pages directly; only the yielded tuple is allocated
+        return RECORD.iter_unpack(self.record_buffer())
+
+    def record_buffer(self):
+        return memoryview(self._map)[HEADER.size:HEADER.size + self._count * RECORD.size]
+
+    def duration_ns(self) -> int:
+        return self._duration_ns
+
+    def view(self):
+        return EventView(self)
+
+    def to_store(self) -> EventStore:
+        store = EventStore(capacity=max(1, self._count))
+        store.geometry = self.geometry
+        for text in self.names[1:]:
+            store.intern(text)
+        for rec in self.records():
+            store.append(*rec)
+        return store
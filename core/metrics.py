@@ -0,0 +1,168 @@
+"""Per-session timing and throughput metrics for recording and playback.
+
+Everything here is built to stay on in production: recording a sample is a
+few integer operations and one list increment, and the histogram has a
+fixed number of buckets however long the session runs.
+"""
+
+import json
+import time
+
+# Log-linear buckets: 8 sub-buckets per power of two (~12% resolution),
+# covering 0 ns up to ~2^40 ns (18 minutes); larger values land in the last bucket
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+BUCKET_COUNT = (40 - SUB_BUCKET_BITS + 1) * SUB_BUCKETS + SUB_BUCKETS
+
+
+def bucket_index(value: int) -> int:
+    if value < SUB_BUCKETS:
+        return max(0, value)
+    shift = value.bit_length() - 1 - SUB_BUCKET_BITS
+    return min(shift * SUB_BUCKETS + (value >> shift), BUCKET_COUNT - 1)
+
+
+def bucket_upper_bound(index: int) -> int:
+    if index < SUB_BUCKETS:
+        return index
+    shift, mantissa = divmod(index, SUB_BUCKETS)
+    shift -= 1
+    return ((mantissa + SUB_BUCKETS + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value_ns: int):
+        if value_ns < 0:
+            value_ns = 0
+        self.counts[bucket_index(value_ns)] += 1
+        self.count += 1
+        self.total += value_ns
+        if value_ns > self.max:
+            self.max = value_ns
+
+    def percentile(self, p: float) -> int:
+        if not self.count:
+            return 0
+        rank = max(1, int(round(p / 100 * self.count)))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bucket_upper_bound(index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ns": self.mean,
+            "p50_ns": self.percentile(50),
+            "p99_ns": self.percentile(99),
+            "max_ns": self.max,
+        }
+
+
+class SessionMetrics:
+    """Counters for one recording or playback session.
+
+    ``lateness`` is how far past its deadline each played event went out,
+    ``callback_latency`` how long each input hook callback took.
+    """
+
+    def __init__(self, kind: str, late_threshold_ms: float = 5.0):
+        self.kind = kind
+        self.late_threshold_ns = int(late_threshold_ms * 1_000_000)
+        self.started_ns = time.perf_counter_ns()
+        self.ended_ns = None
+        self.events = 0
+        self.late_events = 0
+        self.loops = 0
+        self.lateness = LatencyHistogram()
+        self.callback_latency = LatencyHistogram()
+        self.loop_wall = LatencyHistogram()
+
+    def record_lateness(self, lateness_ns: int):
+        self.lateness.record(lateness_ns)
+        if lateness_ns > self.late_threshold_ns:
+            self.late_events += 1
+
+    def record_loop(self, wall_ns: int):
+        self.loops += 1
+        self.loop_wall.record(wall_ns)
+
+    def finish(self):
+        self.ended_ns = time.perf_counter_ns()
+
+    @property
+    def elapsed_s(self) -> float:
+        end = self.ended_ns if self.ended_ns is not None else time.perf_counter_ns()
+        return (end - self.started_ns) / 1e9
+
+    @property
+    def events_per_second(self) -> float:
+        elapsed = self.elapsed_s
+        return self.events / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "kind": self.kind,
+            "elapsed_s": self.elapsed_s,
+            "events": self.events,
+            "events_per_second": self.events_per_second,
+            "late_events": self.late_events,
+            "late_threshold_ns": self.late_threshold_ns,
+            "loops": self.loops,
+            "lateness": self.lateness.summary(),
+            # Only ring capture times its hook callbacks; None rather than a row of zeros
+            "callback_latency": self.callback_latency.summary() if self.callback_latency.count else None,
+            "loop_wall": self.loop_wall.summary(),
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, prefix: str = "bettertask") -> str:
+        return prometheus_text([self], prefix)
+
+
+def prometheus_text(sessions, prefix: str = "bettertask") -> str:
+    """Prometheus text format for several sessions: each metric family once,
+    one sample per ``session`` label. Summaries with no observations (e.g.
+    hook latency when capture ran in direct mode) are left out."""
+    lines = []
+    for name, kind, help_text, value in (
+            ("events_total", "counter", "Events recorded or played.", lambda m: m.events),
+            ("events_per_second", "gauge", "Average event rate over the session.", lambda m: m.events_per_second),
+            ("late_events_total", "counter", "Played events later than the late threshold.",
+             lambda m: m.late_events),
+            ("loops_total", "counter", "Completed playback loops.", lambda m: m.loops)):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for m in sessions:
+            lines.append(f'{prefix}_{name}{{session="{m.kind}"}} {value(m)}')
+    for name, attr, help_text in (
+            ("lateness_seconds", "lateness", "Playback lateness per event."),
+            ("callback_latency_seconds", "callback_latency", "Input hook callback duration."),
+            ("loop_wall_seconds", "loop_wall", "Wall time per playback loop.")):
+        observed = [(m.kind, getattr(m, attr)) for m in sessions if getattr(m, attr).count]
+        if not observed:
+            continue
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} summary")
+        for kind, histogram in observed:
+            labels = f'{{session="{kind}"}}'
+            for quantile in (0.5, 0.99):
+                value = histogram.percentile(quantile * 100) / 1e9
+                lines.append(f'{prefix}_{name}{{session="{kind}",quantile="{quantile}"}} {value}')
+            lines.append(f"{prefix}_{name}_sum{labels} {histogram.total / 1e9}")
+            lines.append(f"{prefix}_{name}_count{labels} {histogram.count}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,206 @@
+"""Play many macros from one thread.
+
+A ``Playback`` per macro means a thread per macro, each sleeping on its own
+and all of them fighting over the GIL. ``MultiScheduler`` instead keeps one
+heap of (next deadline, run) entries across every running macro and a
+single dispatch thread that pops whichever run is due next, injects that
+run's due steps through the run's own backend, and pushes the run back
+with its following deadline.
+
+Like ``PrecisionScheduler`` the thread sleeps until shortly before the
+earliest deadline and spins for the rest; starting or stopping a run wakes
+it so a new earlier deadline is never missed. Loops of one run share one
+absolute timeline, as in ``Playback.play``. Between loops and on stop, a
+run releases only the keys and buttons its macro is holding at that point
+(see core.seek).
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from bisect import bisect_right
+
+from core.metrics import SessionMetrics
+from core.plan import PlanCache, PlaybackPlan, Timing
+from core.remap import RemapCache, compile_for_layout
+from core.scheduler import DEFAULT_LATENESS_BUDGET_NS
+from core.seek import held_index, release_steps
+
+
+class MacroRun:
+    __slots__ = ("run_id", "plan", "backend", "loops", "loops_done", "origin_ns", "index",
+                 "stopped", "done", "metrics", "lock", "loop_release")
+
+    def __init__(self, run_id, plan, backend, loops, origin_ns):
+        self.run_id = run_id
+        self.plan = plan
+        self.backend = backend
+        self.loops = loops  # 0 = until stopped
+        self.loops_done = 0
+        self.origin_ns = origin_ns
+        self.index = 0
+        self.stopped = False
+        self.done = threading.Event()
+        self.metrics = SessionMetrics("playback")
+        # Held by whoever is injecting for this run: the dispatch thread, or stop()
+        self.lock = threading.Lock()
+        # What the macro leaves held at the end of a loop
+        self.loop_release = release_steps(held_index(plan).state_at(len(plan)), plan.steps)
+
+    @property
+    def next_deadline(self):
+        return self.origin_ns + self.plan.deadlines[self.index]
+
+
+class MultiScheduler:
+    """One dispatch thread for any number of concurrently playing macros."""
+
+    def __init__(self, lateness_budget_ms=DEFAULT_LATENESS_BUDGET_NS / 1_000_000, batch_window_ms=1.0,
+                 plan_cache=None):
+        self.lateness_budget_ns = int(lateness_budget_ms * 1_000_000)
+        self.batch_window_ns = int(batch_window_ms * 1_000_000)
+        self.plan_cache = plan_cache if plan_cache is not None else PlanCache(max_entries=64)
+        self.remap_cache = RemapCache()
+        self.runs = {}
+        self.events_dispatched = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def compile(self, events, timing: Timing = None) -> PlaybackPlan:
+        return compile_for_layout(events, self.plan_cache, self.remap_cache, timing)
+
+    def start(self, events, backend, loops=1, timing: Timing = None, start_ns=None) -> int:
+        """Queue a macro (events or a compiled plan); returns its run id."""
+        plan = events if isinstance(events, PlaybackPlan) else self.compile(events, timing)
+        run_id = next(self._ids)
+        run = MacroRun(run_id, plan, backend, max(0, int(loops)),
+                       start_ns if start_ns is not None else time.perf_counter_ns())
+        with self._lock:
+            self.runs[run_id] = run
+            if len(plan):
+                heapq.heappush(self._heap, (run.next_deadline, next(self._seq), run))
+            else:
+                self._finish(run)
+        self._ensure_thread()
+        self._wake.set()
+        return run_id
+
+    def stop(self, run_id):
+        with self._lock:
+            run = self.runs.get(run_id)
+            if run is None or run.done.is_set():
+                return
+            # The heap entry is dropped lazily when it reaches the top
+            run.stopped = True
+            self._finish(run)
+        self._wake.set()
+        # Let go of whatever the macro holds at the step it reached; the run
+        # lock makes this wait for a batch being injected right now
+        with run.lock:
+            steps = release_steps(held_index(run.plan).state_at(run.index), run.plan.steps)
+            if steps:
+                run.backend.execute(steps)
+
+    def stop_all(self):
+        for run_id in list(self.runs):
+            self.stop(run_id)
+
+    def wait(self, run_id, timeout=None) -> bool:
+        run = self.runs.get(run_id)
+        return run is None or run.done.wait(timeout)
+
+    def close(self):
+        self.stop_all()
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def status(self):
+        with self._lock:
+            return {run_id: {"loops_done": run.loops_done, "loops": run.loops, "done": run.done.is_set(),
+                             "events": run.metrics.events}
+                    for run_id, run in self.runs.items()}
+
+    def _finish(self, run):
+        run.metrics.finish()
+        run.done.set()
+        # Drop finished runs so a long-lived scheduler doesn't accumulate them;
+        # anyone holding the id can still wait() on it (returns immediately)
+        self.runs.pop(run.run_id, None)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._closed = False
+            self._thread = threading.Thread(target=self._loop, name="multi-scheduler", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        clock = time.perf_counter_ns
+        heap, wake, lock = self._heap, self._wake, self._lock
+        budget_ns = self.lateness_budget_ns
+        while not self._closed:
+            with lock:
+                deadline = heap[0][0] if heap else None
+            if deadline is None:
+                wake.wait()
+                wake.clear()
+                continue
+            coarse_ns = deadline - clock() - budget_ns
+            if coarse_ns > 0:
+                # A start/stop may have changed the head of the heap; look again
+                if wake.wait(coarse_ns / 1_000_000_000):
+                    wake.clear()
+                    continue
+            while clock() < deadline:
+                if wake.is_set():
+                    break
+            if clock() < deadline:
+                wake.clear()
+                continue
+
+            with lock:
+                _, _, run = heapq.heappop(heap)
+            if run.stopped:
+                continue
+            self._dispatch(run, clock)
+            with lock:
+                if run.stopped:
+                    continue
+                if run.index < len(run.plan):
+                    heapq.heappush(heap, (run.next_deadline, next(self._seq), run))
+                else:
+                    run.loops_done += 1
+                    if run.loop_release:
+                        with run.lock:
+                            run.backend.execute(run.loop_release)
+                    if run.loops and run.loops_done >= run.loops:
+                        self._finish(run)
+                    else:
+                        run.origin_ns += run.plan.duration_ns
+                        run.index = 0
+                        heapq.heappush(heap, (run.next_deadline, next(self._seq), run))
+
+    def _dispatch(self, run, clock):
+        deadlines, steps = run.plan.deadlines, run.plan.steps
+        with run.lock:
+            if run.stopped:
+                return
+            origin_ns, i = run.origin_ns, run.index
+            # Everything of this run due within the window (or already overdue) goes out as one batch
+            now = clock() - origin_ns
+            j = bisect_right(deadlines, max(deadlines[i] + self.batch_window_ns, now), i + 1, len(steps))
+            run.backend.execute(steps[i:j])
+            run.index = j
+        record_lateness = run.metrics.record_lateness
+        for k in range(i, j):
+            record_lateness(now - deadlines[k])
+        run.metrics.events += j - i
+        self.events_dispatched += j - i
@@ -0,0 +1,213 @@
+"""Playback plans: macros compiled once into ready-to-inject steps.
+
+Compiling resolves everything the old per-event dispatch redid on every
+event of every loop: the event type becomes an integer opcode, key strings
+like ``Key.shift`` / ``'a'`` become the names the injector wants, button
+strings become "left" / "right", and coordinates become ints. A plan is two
+parallel lists, ``deadlines`` (ns offsets from the start of the macro) and
+``steps`` (``(opcode, x, y, arg)`` tuples), so the hot loop is a zip.
+Retimed plans (speed / idle-gap cap) share the steps list and only get a
+new ``deadlines`` list.
+"""
+
+from core.event_store import (
+    NS_PER_SECOND,
+    EV_MOVE, EV_CLICK_DOWN, EV_CLICK_UP, EV_SCROLL, EV_KEY_PRESS, EV_KEY_RELEASE,
+)
+
+OP_MOVE = 0
+OP_MOUSE_DOWN = 1
+OP_MOUSE_UP = 2
+OP_SCROLL = 3
+OP_KEY_DOWN = 4
+OP_KEY_UP = 5
+
+# pynput scroll steps per recorded wheel notch, as the old playback used
+SCROLL_SCALE = 10
+
+
+def resolve_key(name: str) -> str:
+    return name.replace("'", "").replace("Key.", "")
+
+
+def resolve_button(name: str):
+    name = name.lower()
+    if "left" in name:
+        return "left"
+    if "right" in name:
+        return "right"
+    return None
+
+
+class PlaybackPlan:
+    def __init__(self, deadlines, steps, duration_ns=None, geometry=None):
+        self.deadlines = deadlines
+        self.steps = steps
+        # Monitor rects the coordinates refer to (None = unknown, play as recorded)
+        self.geometry = geometry
+        self.duration_ns = duration_ns if duration_ns is not None else (deadlines[-1] if deadlines else 0)
+
+    def __len__(self):
+        return len(self.steps)
+
+
+def compile_plan(events) -> PlaybackPlan:
+    """Compile a Recorder view, EventStore, mapped macro or list of event dicts."""
+    source = getattr(events, "store", events)
+    if hasattr(source, "records"):
+        return _compile_records(source)
+    return _compile_dicts(events)
+
+
+def _compile_records(source) -> PlaybackPlan:
+    names = source.names
+    # Resolve each distinct key/button string once, not once per event
+    keys = [resolve_key(n) for n in names]
+    buttons = [resolve_button(n) for n in names]
+
+    deadlines = []
+    steps = []
+    add_deadline = deadlines.append
+    add_step = steps.append
+    for code, t_ns, x, y, dx, dy, name in source.records():
+        if code == EV_MOVE:
+            step = (OP_MOVE, x, y, None)
+        elif code == EV_CLICK_DOWN or code == EV_CLICK_UP:
+            button = buttons[name]
+            if button is None:
+                step = (OP_MOVE, x, y, None)
+            else:
+                step = (OP_MOUSE_DOWN if code == EV_CLICK_DOWN else OP_MOUSE_UP, x, y, button)
+        elif code == EV_SCROLL:
+            step = (OP_SCROLL, x, y, dy * SCROLL_SCALE)
+        elif code == EV_KEY_PRESS:
+            step = (OP_KEY_DOWN, 0, 0, keys[name])
+        elif code == EV_KEY_RELEASE:
+            step = (OP_KEY_UP, 0, 0, keys[name])
+        else:
+            print(f"Unknown event code: {code}")
+            continue
+        add_deadline(t_ns)
+        add_step(step)
+    return PlaybackPlan(deadlines, steps, source.duration_ns(), getattr(source, "geometry", None))
+
+
+def _compile_dicts(events) -> PlaybackPlan:
+    deadlines = []
+    steps = []
+    for event in events:
+        etype = event["type"]
+        if etype in ("move", "click", "scroll"):
+            x, y = event["position"]
+            x, y = int(x), int(y)
+        if etype == "move":
+            step = (OP_MOVE, x, y, None)
+        elif etype == "click":
+            button = resolve_button(str(event["button"]))
+            if button is None:
+                step = (OP_MOVE, x, y, None)
+            else:
+                step = (OP_MOUSE_DOWN if event["pressed"] else OP_MOUSE_UP, x, y, button)
+        elif etype == "scroll":
+            step = (OP_SCROLL, x, y, int(event["delta"][1] * SCROLL_SCALE))
+        elif etype == "key_press":
+            step = (OP_KEY_DOWN, 0, 0, resolve_key(str(event["key"])))
+        elif etype == "key_release":
+            step = (OP_KEY_UP, 0, 0, resolve_key(str(event["key"])))
+        else:
+            print(f"Unknown event type: {etype}")
+            continue
+        deadlines.append(int(event["time"] * NS_PER_SECOND))
+        steps.append(step)
+    return PlaybackPlan(deadlines, steps)
+
+
+class Timing:
+    """Speed multiplier and idle-gap cap applied to a plan's timeline.
+
+    Any gap between consecutive events longer than ``idle_gap_ms`` is
+    shortened to ``idle_gap_to_ms`` (0 disables the cap), then every
+    deadline is divided by ``speed``.
+    """
+
+    __slots__ = ("speed", "idle_gap_ms", "idle_gap_to_ms")
+
+    def __init__(self, speed: float = 1.0, idle_gap_ms: float = 0.0, idle_gap_to_ms: float = 0.0):
+        if speed <= 0:
+            raise ValueError(f"Playback speed must be positive, got {speed}")
+        self.speed = float(speed)
+        self.idle_gap_ms = max(0.0, float(idle_gap_ms))
+        self.idle_gap_to_ms = max(0.0, min(float(idle_gap_to_ms), self.idle_gap_ms))
+
+    def key(self):
+        return (self.speed, self.idle_gap_ms, self.idle_gap_to_ms)
+
+    @property
+    def is_identity(self):
+        return self.speed == 1.0 and not self.idle_gap_ms
+
+
+def retime(plan: PlaybackPlan, timing: Timing) -> PlaybackPlan:
+    """Rewrite a plan's deadlines once, so the hot loop never checks gaps."""
+    if timing.is_identity:
+        return plan
+    max_gap = int(timing.idle_gap_ms * 1_000_000)
+    gap_to = int(timing.idle_gap_to_ms * 1_000_000)
+    speed = timing.speed
+
+    deadlines = []
+    removed = 0
+    previous = 0
+    for deadline in plan.deadlines:
+        gap = deadline - previous
+        if max_gap and gap > max_gap:
+            removed += gap - gap_to
+        previous = deadline
+        deadlines.append(int((deadline - removed) / speed))
+
+    tail = plan.duration_ns - previous
+    if max_gap and tail > max_gap:
+        removed += tail - gap_to
+    duration_ns = int((plan.duration_ns - removed) / speed)
+    return PlaybackPlan(deadlines, plan.steps, duration_ns, plan.geometry)
+
+
+class PlanCache:
+    """Remembers the compiled plan for each macro source.
+
+    Keyed on the source object plus its length, so a recording that has
+    grown since it was compiled is compiled again. Sources are held
+    strongly so their ids cannot be reused while cached. Retimed variants
+    of a plan are cached alongside it, one per Timing.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self._entries = {}
+
+    def get(self, events, timing: Timing = None) -> PlaybackPlan:
+        source = getattr(events, "store", events)
+        key = id(source)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] is not source or entry[1] != len(source):
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                self._entries.pop(next(iter(self._entries)))
+            entry = (source, len(source), compile_plan(events), {})
+            self._entries[key] = entry
+        plan, variants = entry[2], entry[3]
+        if timing is None or timing.is_identity:
+            return plan
+        retimed = variants.get(timing.key())
+        if retimed is None:
+            retimed = variants[timing.key()] = retime(plan, timing)
+        return retimed
+
+    def discard(self, events):
+        """Forget ``events``' plans, e.g. when the macro is closed."""
+        source = getattr(events, "store", events)
+        entry = self._entries.get(id(source))
+        if entry is not None and entry[0] is source:
+            del self._entries[id(source)]
+
+    def clear(self):
+        self._entries.clear()
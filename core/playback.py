@@ -1,100 +1,161 @@
-import pydirectinput
 import time
-from pynput.mouse import Controller as MouseController
-from core.recording import Recorder
+from bisect import bisect_left, bisect_right
+from core.backends import create_backend
+from core.event_store import NS_PER_SECOND
+from core.scheduler import DEFAULT_LATENESS_BUDGET_NS, PrecisionScheduler
+from core.metrics import SessionMetrics
+from core.plan import PlanCache, Timing, retime
+from core.remap import RemapCache, compile_for_layout
+from core.seek import held_index, release_steps, window_plan
 
 
 class Playback:
-    def __init__(self, events):
+    def __init__(self, events, backend=None, precise=True, lateness_budget_ms=DEFAULT_LATENESS_BUDGET_NS / 1_000_000,
+                 batch_window_ms=1.0, plan_cache=None):
         self.events = events or []
         if not self.events:
             print("No events to play back.")
         self.playing = False
-        pydirectinput.PAUSE = 0.001
-        self.mouse_controller = MouseController()
-
-    def interruptible_sleep(self, duration):
-        end_time = time.monotonic() + duration
-        while self.playing:
-            remaining = end_time - time.monotonic()
-            if remaining <= 0:
-                break
-            time.sleep(min(0.01, remaining))
-
-    def start_playback(self):
+        # Precise mode spins for the final stretch before each deadline; coarse mode only sleeps
+        budget_ns = int(lateness_budget_ms * 1_000_000) if precise else 0
+        self.scheduler = PrecisionScheduler(lateness_budget_ns=budget_ns)
+        # Steps due within this window of each other are injected as one batch
+        self.batch_window_ns = int(batch_window_ms * 1_000_000)
+        self.backend = backend if backend is not None else create_backend()
+        # Several players (e.g. in the daemon) can share one cache of compiled plans
+        self.plan_cache = plan_cache if plan_cache is not None else PlanCache()
+        self.timing = Timing()
+        # Part of the macro to play, in recorded time: [start, end), end None = to the end
+        self.window = (0, None)
+        self._windowed = None
+        self.metrics = SessionMetrics("playback")
+        self.loops_done = 0
+        # Where the current timeline started (perf_counter_ns)
+        self.origin_ns = None
+        self.remap_cache = RemapCache(max_entries=8)
+        # Steps [i, j) being played right now, for releasing after an interrupt
+        self._batch = (0, 0)
+
+    def play(self, loops=1, duration_s=None, on_loop=None) -> int:
+        """Play ``loops`` times (0 = no limit) on one timeline; returns loops completed."""
         if not self.events:
-            return
+            return 0
         self.playing = True
+        self.scheduler.reset()
+        self.metrics = SessionMetrics("playback")
+        # Compile, remap and index before the clock starts, so no loop boundary pays for it
+        plan = self.plan()
+        n = len(plan)
+        if not n:
+            self.playing = False
+            return 0
+        held = held_index(plan)
+        loop_release = release_steps(held.state_at(n), plan.steps)
         print("Starting playback...")
-        self.play_events()
-        print("Playback finished.")
+        origin_ns = self.origin_ns = time.perf_counter_ns()
+        end_ns = origin_ns + int(duration_s * NS_PER_SECOND) if duration_s else None
+        self.loops_done = 0
+        try:
+            while self.playing and (not loops or self.loops_done < loops):
+                limit = n
+                if end_ns is not None:
+                    if origin_ns >= end_ns:
+                        break
+                    limit = bisect_left(plan.deadlines, end_ns - origin_ns)
+                loop_start = time.perf_counter_ns()
+                try:
+                    reached = self.play_events(origin_ns, limit, plan)
+                except KeyboardInterrupt:
+                    # Interrupted inside a batch: it may have got anywhere in it, so
+                    # release what is held either side of it
+                    i, j = self._batch
+                    state = held.state_at(j)
+                    state.keys |= held.state_at(i).keys
+                    state.buttons |= held.state_at(i).buttons
+                    self.backend.execute(release_steps(state, plan.steps))
+                    raise
+                if reached < n:
+                    # Stopped or out of time mid-loop: let go of what is held at that point
+                    self.backend.execute(release_steps(held.state_at(reached), plan.steps))
+                    break
+                if loop_release:
+                    self.backend.execute(loop_release)
+                self.metrics.record_loop(time.perf_counter_ns() - loop_start)
+                self.loops_done += 1
+                origin_ns += plan.duration_ns
+                if on_loop is not None and on_loop(self.loops_done) is False:
+                    break
+        finally:
+            self.playing = False
+            self.metrics.finish()
+        print(f"Playback finished after {self.loops_done} loop(s).")
+        return self.loops_done
 
     def stop_playback(self):
         self.playing = False
-
-    def play_events(self):
-        start_time = time.perf_counter()
-
-        for event in self.events:
-            if not self.playing:
+        self.scheduler.stop()
+
+    def duration_ns(self):
+        return self.plan().duration_ns
+
+    def plan(self):
+        if self.window == (0, None):
+            return compile_for_layout(self.events, self.plan_cache, self.remap_cache, self.timing)
+        return self.remap_cache.current(self._window_plan())
+
+    def _window_plan(self):
+        # Cut the window from the recorded-time plan, then retime the cut, so
+        # start/end always refer to the recording's own clock
+        base = self.plan_cache.get(self.events)
+        key = (self.window, self.timing.key())
+        cached = self._windowed
+        if cached is None or cached[0] is not base or cached[1] != key:
+            cached = self._windowed = (base, key, retime(window_plan(base, *self.window), self.timing))
+        return cached[2]
+
+    def set_window(self, start_ms=0.0, end_ms=None):
+        """Play only ``[start_ms, end_ms)`` of the macro (``end_ms`` None = to the end)."""
+        start_ns = int(start_ms * 1_000_000)
+        end_ns = int(end_ms * 1_000_000) if end_ms is not None else None
+        if start_ns < 0 or (end_ns is not None and end_ns <= start_ns):
+            raise ValueError(f"Invalid playback window {start_ms}..{end_ms} ms")
+        # An empty window would make every loop zero-length
+        duration_ns = self.plan_cache.get(self.events).duration_ns if self.events else 0
+        if start_ns >= duration_ns and (start_ns, end_ns) != (0, None):
+            raise ValueError(f"Playback window starts at {start_ms} ms, "
+                             f"past the end of the macro ({duration_ns / 1_000_000:.0f} ms)")
+        self.window = (start_ns, end_ns)
+
+    def set_timing(self, speed=1.0, idle_gap_ms=0.0, idle_gap_to_ms=0.0):
+        self.timing = Timing(speed, idle_gap_ms, idle_gap_to_ms)
+
+    def loops_per_hour(self):
+        duration_ns = self.duration_ns()
+        return 3600 * NS_PER_SECOND / duration_ns if duration_ns else 0.0
+
+    def play_events(self, origin_ns, limit=None, plan=None) -> int:
+        """Play steps up to ``limit``; returns the index of the first step not played."""
+        plan = plan if plan is not None else self.plan()
+        deadlines, steps = plan.deadlines, plan.steps
+        execute = self.backend.execute
+        wait_until = self.scheduler.wait_until
+        clock = time.perf_counter_ns
+        window_ns = self.batch_window_ns
+        metrics = self.metrics
+        record_lateness = metrics.record_lateness
+        i, n = 0, len(steps) if limit is None else limit
+        self._batch = (0, 0)
+        while i < n:
+            if not wait_until(origin_ns + deadlines[i]):
                 break
-
-            wait_time = event["time"] - (time.perf_counter() - start_time)
-            if wait_time > 0:
-                self.interruptible_sleep(wait_time)
-
-            if not self.playing:
-                break
-
-            self.play_event(event)
-
-    def play_event(self, event):
-        etype = event["type"]
-
-        if etype == "move":
-            x, y = event["position"]
-            pydirectinput.moveTo(int(x), int(y))
-
-        elif etype == "click":
-            x, y = event["position"]
-            pydirectinput.moveTo(int(x), int(y))
-            button = str(event["button"]).lower()
-            pressed = event["pressed"]
-
-            if "left" in button:
-                if pressed:
-                    pydirectinput.moveTo(int(x), int(y))
-                    pydirectinput.mouseDown(button="left")
-                else:
-                    pydirectinput.moveTo(int(x), int(y))
-                    pydirectinput.mouseUp(button="left")
-            elif "right" in button:
-                if pressed:
-                    pydirectinput.moveTo(int(x), int(y))
-                    pydirectinput.mouseDown(button="right")
-                else:
-                    pydirectinput.moveTo(int(x), int(y))
-                    pydirectinput.mouseUp(button="right")
-
-        elif etype == "scroll":
-            x, y = event["position"]
-            dx, dy = event["delta"]
-            pydirectinput.moveTo(int(x), int(y))
-            self.mouse_controller.scroll(0, int(dy * 10))
-
-        elif etype == "key_press":
-            key = str(event["key"]).replace("'", "").replace("Key.", "")
-            try:
-                pydirectinput.keyDown(key)
-            except Exception as e:
-                print(f"[WARN] Could not press key {key}: {e}")
-
-        elif etype == "key_release":
-            key = str(event["key"]).replace("'", "").replace("Key.", "")
-            try:
-                pydirectinput.keyUp(key)
-            except Exception as e:
-                print(f"[WARN] Could not release key {key}: {e}")
-
-        else:
-            print(f"Unknown event type: {etype}")
+            # Everything due within this tick (or already overdue) goes out in one batch
+            now = clock() - origin_ns
+            j = bisect_right(deadlines, max(deadlines[i] + window_ns, now), i + 1, n)
+            self._batch = (i, j)
+            execute(steps[i:j])
+            self._batch = (j, j)
+            for k in range(i, j):
+                record_lateness(now - deadlines[k])
+            metrics.events += j - i
+            i = j
+        return i
@@ -1,26 +1,102 @@
-from pynput import mouse, keyboard
+import os
+import threading
 import time
+from core.capture import DEFAULT_DRAIN_INTERVAL_S, DEFAULT_RING_CAPACITY, RingCapture
+from core.metrics import SessionMetrics
+from core.stream_log import DEFAULT_CHUNK_EVENTS, DEFAULT_SYNC_INTERVAL_S, StreamLog, recover_log
+from utils.screen_helper import current_snapshot, refresh_monitor_state
+from core.event_store import (
+    EventStore, NS_PER_SECOND, NO_NAME,
+    EV_MOVE, EV_CLICK_DOWN, EV_CLICK_UP, EV_SCROLL, EV_KEY_PRESS, EV_KEY_RELEASE,
+)
+
+CAPTURE_DIRECT = "direct"
+CAPTURE_RING = "ring"
+
 
 class Recorder:
-    def __init__(self):
-        self.events = []
+    def __init__(self, simplifier=None, capture=CAPTURE_DIRECT, ring_capacity=DEFAULT_RING_CAPACITY,
+                 stream_path=None, chunk_events=DEFAULT_CHUNK_EVENTS, sync_interval_s=DEFAULT_SYNC_INTERVAL_S):
+        self.store = EventStore()
+        # Optional core.simplify.PathSimplifier that drops redundant moves while recording
+        self.simplifier = simplifier
+        # "ring" keeps the hook callbacks down to a timestamp and a ring buffer write
+        self.capture = capture
+        self.ring_capacity = ring_capacity
+        self.ring_capture = None
+        # Streaming mode: with a stream_path, events go to an append-only log in
+        # chunks of chunk_events, so memory stays at one chunk however long the
+        # capture runs. stop_recording turns the log into a .btm and maps it.
+        # Chunks are written by a flusher thread, never by the OS hooks.
+        self.stream_path = stream_path
+        self.chunk_events = chunk_events
+        self.sync_interval_s = sync_interval_s
+        self.log = None
+        self._sync_interval_ns = int(sync_interval_s * NS_PER_SECOND)
+        # Guards self.store (and the simplifier) against the hooks and the flusher
+        self._lock = threading.Lock()
+        self._spare = None
+        self._flush_stop = threading.Event()
+        self._flush_thread = None
+        self.metrics = SessionMetrics("record")
+        self._last_t = 0
         self.recording = False
         self.start_time = None
-        self.last_position = None
+        self.start_ns = None
+
+    @property
+    def events(self):
+        return self.store.view()
+
+    @property
+    def event_count(self):
+        """Events kept so far, including any already streamed to disk."""
+        written = self.log.events_written if self.log is not None else 0
+        return written + len(self.store)
+
+    @property
+    def simplified_count(self):
+        return self.simplifier.removed if self.simplifier is not None else 0
 
     def start_recording(self):
         self.recording = True
-        self.start_time = time.perf_counter()
-        self.events = []
+        # pynput installs OS hooks on import on some platforms; only pay for it when recording
+        from pynput import mouse, keyboard
+
+        self.start_ns = time.perf_counter_ns()
+        self.start_time = self.start_ns / NS_PER_SECOND
+        self.store = EventStore()
+        try:
+            self.store.geometry = refresh_monitor_state().monitors or None
+        except Exception:
+            self.store.geometry = current_snapshot().monitors or None
+        if self.simplifier is not None:
+            self.simplifier.reset()
+            self.simplifier.removed = 0
+        self._last_t = 0
+        self.metrics = SessionMetrics("record")
+        if self.stream_path is not None:
+            self.log = StreamLog(self.stream_path, self.store.geometry, self.sync_interval_s)
+            self._spare = self.store.empty_like(self.chunk_events)
+            self._flush_stop.clear()
+            self._flush_thread = threading.Thread(target=self._flush_loop, name="record-flush", daemon=True)
+            self._flush_thread.start()
+
+        callbacks = self
+        if self.capture == CAPTURE_RING:
+            self.ring_capture = RingCapture(self.append_raw, self.start_ns, capacity=self.ring_capacity)
+            self.metrics.callback_latency = self.ring_capture.stats.latency
+            self.ring_capture.start()
+            callbacks = self.ring_capture
 
         self.mouse_listener = mouse.Listener(
-            on_move=self.on_move,
-            on_click=self.on_click,
-            on_scroll=self.on_scroll,
+            on_move=callbacks.on_move,
+            on_click=callbacks.on_click,
+            on_scroll=callbacks.on_scroll,
         )
         self.keyboard_listener = keyboard.Listener(
-            on_press=self.on_press,
-            on_release=self.on_release
+            on_press=callbacks.on_press,
+            on_release=callbacks.on_release
         )
 
         self.mouse_listener.start()
@@ -30,33 +106,110 @@ class Recorder:
         self.recording = False
         self.mouse_listener.stop()
         self.keyboard_listener.stop()
+        if self.ring_capture is not None:
+            self.ring_capture.stop()
+            stats = self.ring_capture.stats
+            print(f"[INFO] Capture: {stats.drained} events, {stats.overflows} overflows, "
+                  f"callback mean {stats.callback_ns_mean / 1000:.1f} us / max {stats.callback_ns_max / 1000:.1f} us")
+        if self._flush_thread is not None:
+            self._flush_stop.set()
+            self._flush_thread.join()
+            self._flush_thread = None
+        self.flush_moves()
+        if self.log is not None:
+            self.finish_stream()
+        self.metrics.finish()
+        if self.simplifier is not None:
+            print(f"[INFO] Path simplification removed {self.simplifier.removed} move events")
+
+    def flush_moves(self):
+        # Non-move events must land after the move the simplifier is holding back
+        if self.simplifier is not None:
+            held = self.simplifier.flush()
+            if held is not None:
+                self.store.append(EV_MOVE, *held)
+
+    def flush_chunk(self):
+        # Swap in the spare buffer under the lock; the write and fsync happen outside it
+        with self._lock:
+            chunk, self.store = self.store, self._spare
+        self.log.write_chunk(chunk)
+        chunk.clear()
+        self._spare = chunk
+
+    def flush_due(self):
+        """Write the chunk once it is full or its oldest event is sync_interval old.
+
+        Runs on a timer, so a quiet tail reaches the disk without waiting
+        for another event.
+        """
+        with self._lock:
+            store = self.store
+            held = self.simplifier.pending if self.simplifier is not None else None
+            oldest = store.t[0] if len(store) else held[0] if held is not None else None
+            if oldest is None:
+                due = False
+            elif time.perf_counter_ns() - self.start_ns - oldest >= self._sync_interval_ns:
+                self.flush_moves()
+                due = True
+            else:
+                due = len(store) >= self.chunk_events
+        if due:
+            self.flush_chunk()
+        else:
+            self.log.sync_due()
+
+    def _flush_loop(self):
+        while not self._flush_stop.wait(DEFAULT_DRAIN_INTERVAL_S):
+            self.flush_due()
+
+    def finish_stream(self):
+        """Close the log and swap the chunk buffer for the whole recording, memory-mapped."""
+        from core.macro_file import load_macro
+        self.flush_chunk()
+        self.log.close()
+        result = recover_log(self.stream_path)
+        self.store = load_macro(result["out_path"])
+        self.log = None
+        self._spare = None
+        os.remove(self.stream_path)
+        print(f"[INFO] Streamed {result['events']} events in {result['chunks']} chunks to {result['out_path']}")
+
+    def append(self, code, t_ns, x=0, y=0, dx=0, dy=0, name=NO_NAME):
+        with self._lock:
+            self.metrics.events += 1
+            if code == EV_MOVE and self.simplifier is not None:
+                kept = self.simplifier.add(t_ns, x, y)
+                if kept is not None:
+                    self.store.append(EV_MOVE, *kept)
+            else:
+                if code != EV_MOVE:
+                    self.flush_moves()
+                self.store.append(code, t_ns, x, y, dx, dy, name)
+
+    def intern(self, text):
+        # Mouse and keyboard hooks run on separate threads
+        with self._lock:
+            return self.store.intern(text)
+
+    def append_raw(self, code, t_ns, x, y, dx, dy, raw):
+        # Drain-thread sink for ring capture. The two rings are drained separately,
+        # so clamp to keep timestamps monotonic across a batch boundary.
+        if t_ns < self._last_t:
+            t_ns = self._last_t
+        self._last_t = t_ns
+        name = self.intern(str(raw)) if raw is not None else NO_NAME
+        self.append(code, t_ns, x, y, dx, dy, name)
 
     def on_move(self, x, y):
         if self.recording:
-            current_position = (x, y)
-            delta = (0, 0)
-            if self.last_position is not None:
-                delta = (x - self.last_position[0], y - self.last_position[1])
-
-            self.events.append({
-                "type": "move",
-                "position": current_position,
-                "delta": delta,
-                "last_position": self.last_position,
-                "time": time.perf_counter() - self.start_time
-            })
-            self.last_position = current_position
+            self.append(EV_MOVE, time.perf_counter_ns() - self.start_ns, int(x), int(y))
 
     def on_click(self, x, y, button, pressed):
         if self.recording:
-            event = {
-                "type": "click",
-                "position": (x, y),
-                "button": str(button),
-                "pressed": pressed,
-                "time": time.perf_counter() - self.start_time
-            }
-            self.events.append(event)
+            code = EV_CLICK_DOWN if pressed else EV_CLICK_UP
+            self.append(code, time.perf_counter_ns() - self.start_ns, int(x), int(y),
+                        name=self.intern(str(button)))
 
             # Print click press or release
             action = "pressed" if pressed else "released"
@@ -64,38 +217,22 @@ class Recorder:
 
     def on_click_release(self, x, y, button, pressed):
         if self.recording:
-            self.events.append({
-                "type": "click_release",
-                "position": (x, y),
-                "button": str(button),
-                "pressed": pressed,
-                "time": time.perf_counter() - self.start_time
-            })
+            self.append(EV_CLICK_UP, time.perf_counter_ns() - self.start_ns, int(x), int(y),
+                        name=self.intern(str(button)))
 
     def on_scroll(self, x, y, dx, dy):
         if self.recording:
-            self.events.append({
-                "type": "scroll",
-                "position": (x, y),
-                "delta": (dx, dy),
-                "time": time.perf_counter() - self.start_time
-            })
+            self.append(EV_SCROLL, time.perf_counter_ns() - self.start_ns, int(x), int(y), int(dx), int(dy))
 
     def on_press(self, key):
         if self.recording:
-            self.events.append({
-                "type": "key_press",
-                "key": str(key),
-                "time": time.perf_counter() - self.start_time
-            })
+            self.append(EV_KEY_PRESS, time.perf_counter_ns() - self.start_ns,
+                        name=self.intern(str(key)))
 
     def on_release(self, key):
         if self.recording:
-            self.events.append({
-                "type": "key_release",
-                "key": str(key),
-                "time": time.perf_counter() - self.start_time
-            })
+            self.append(EV_KEY_RELEASE, time.perf_counter_ns() - self.start_ns,
+                        name=self.intern(str(key)))
 
 if __name__ == "__main__":
     recorder = Recorder()
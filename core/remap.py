@@ -0,0 +1,107 @@
+"""Remap a compiled plan from the monitor layout it was recorded on to the
+current one.
+
+Each recorded monitor is mapped onto the current monitor with the same
+index by one affine transform (scale + offset). If the monitor count
+differs, the whole recorded desktop is mapped onto the whole current
+desktop instead. The remap runs once per plan and layout version, in bulk
+with NumPy, so the playback loop itself never touches geometry.
+"""
+
+import threading
+
+from core.plan import OP_SCROLL, PlaybackPlan
+from utils.screen_helper import bounding_rect, current_snapshot
+
+
+def monitor_pairs(recorded, current):
+    """(source rect, target rect) pairs, or None when no remap is needed."""
+    if not recorded or not current:
+        return None
+    recorded, current = tuple(map(tuple, recorded)), tuple(map(tuple, current))
+    if recorded == current:
+        return None
+    if len(recorded) == len(current):
+        return list(zip(recorded, current))
+    return [(bounding_rect(recorded), bounding_rect(current))]
+
+
+def remap_arrays(xs, ys, recorded, current):
+    """Map int coordinate arrays between layouts; returns new int arrays."""
+    import numpy as np
+    pairs = monitor_pairs(recorded, current)
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    if pairs is None:
+        return xs.astype(np.int64), ys.astype(np.int64)
+
+    out_x, out_y = xs.copy(), ys.copy()
+    unassigned = np.ones(len(xs), dtype=bool)
+    for (sx, sy, sw, sh), (dx, dy, dw, dh) in pairs:
+        inside = unassigned & (xs >= sx) & (xs < sx + sw) & (ys >= sy) & (ys < sy + sh)
+        out_x[inside] = dx + (xs[inside] - sx) * (dw / sw)
+        out_y[inside] = dy + (ys[inside] - sy) * (dh / sh)
+        unassigned &= ~inside
+    if unassigned.any():
+        # Points that were on no monitor (e.g. past an edge) follow the desktop as a whole
+        (sx, sy, sw, sh), (dx, dy, dw, dh) = bounding_rect(recorded), bounding_rect(current)
+        out_x[unassigned] = dx + (xs[unassigned] - sx) * (dw / sw)
+        out_y[unassigned] = dy + (ys[unassigned] - sy) * (dh / sh)
+    return out_x.astype(np.int64), out_y.astype(np.int64)
+
+
+def remap_plan(plan: PlaybackPlan, current) -> PlaybackPlan:
+    if monitor_pairs(plan.geometry, current) is None:
+        return plan
+    import numpy as np
+    steps = plan.steps
+    n = len(steps)
+    ops = np.fromiter((s[0] for s in steps), dtype=np.int8, count=n)
+    xs = np.fromiter((s[1] for s in steps), dtype=np.int64, count=n)
+    ys = np.fromiter((s[2] for s in steps), dtype=np.int64, count=n)
+    positional = ops <= OP_SCROLL
+    new_x, new_y = xs.copy(), ys.copy()
+    new_x[positional], new_y[positional] = remap_arrays(xs[positional], ys[positional], plan.geometry, current)
+
+    remapped = [
+        (op, x, y, arg) if has_position else step
+        for step, (op, _, _, arg), x, y, has_position
+        in zip(steps, steps, new_x.tolist(), new_y.tolist(), positional.tolist())
+    ]
+    return PlaybackPlan(plan.deadlines, remapped, plan.duration_ns, geometry=tuple(current))
+
+
+class RemapCache:
+    """Remapped plans keyed by base plan, redone only when the layout version changes.
+
+    Base plans are held strongly (as in PlanCache) so their ids cannot be
+    reused while cached. Safe to share between threads.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, plan: PlaybackPlan, snapshot) -> PlaybackPlan:
+        if plan.geometry is None:
+            return plan
+        key = id(plan)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is plan and entry[1] == snapshot.version:
+                return entry[2]
+        remapped = remap_plan(plan, snapshot.monitors)
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (plan, snapshot.version, remapped)
+        return remapped
+
+    def current(self, plan: PlaybackPlan) -> PlaybackPlan:
+        return self.get(plan, current_snapshot())
+
+
+def compile_for_layout(events, plan_cache, remap_cache, timing=None) -> PlaybackPlan:
+    """The plan for ``events``, remapped once per plan and layout version."""
+    return remap_cache.current(plan_cache.get(events, timing))
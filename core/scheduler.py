@@ -0,0 +1,45 @@
+import threading
+import time
+
+DEFAULT_LATENESS_BUDGET_NS = 2_000_000
+
+
+class PrecisionScheduler:
+    """Waits for absolute perf_counter_ns deadlines.
+
+    The bulk of a wait is spent blocked on ``stop_event`` so a stop request
+    wakes the caller immediately. The last ``lateness_budget_ns`` before the
+    deadline is busy-waited, because OS sleeps routinely overshoot by a few
+    milliseconds. A budget of 0 gives a plain coarse sleep with no spinning.
+
+    Deadlines are absolute, so an event that fires late never pushes the
+    ones after it back and error cannot build up over a long macro.
+    """
+
+    def __init__(self, lateness_budget_ns: int = DEFAULT_LATENESS_BUDGET_NS, stop_event=None):
+        self.lateness_budget_ns = max(0, int(lateness_budget_ns))
+        self.stop_event = stop_event or threading.Event()
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def reset(self):
+        self.stop_event.clear()
+
+    def wait_until(self, deadline_ns: int) -> bool:
+        """Block until ``deadline_ns``; returns False if stopped first."""
+        clock = time.perf_counter_ns
+        stop_event = self.stop_event
+
+        coarse_ns = deadline_ns - clock() - self.lateness_budget_ns
+        if coarse_ns > 0 and stop_event.wait(coarse_ns / 1_000_000_000):
+            return False
+
+        while clock() < deadline_ns:
+            if stop_event.is_set():
+                return False
+        return not stop_event.is_set()
@@ -0,0 +1,121 @@
+"""Seeking into a plan and cutting out time windows.
+
+A plan's deadlines are sorted, so the step at any time is found by
+bisection. What a seek also needs is the input state at that point: which
+keys and mouse buttons the macro is holding down and where the pointer
+is. ``HeldIndex`` records that state at every ``interval``-th step in one
+pass (done once per plan and cached on it), so the state at any step is a
+checkpoint plus at most ``interval`` steps of replay.
+
+``window_plan`` turns ``[start_ns, end_ns)`` of a plan into a plan of its
+own: it first restores the state held at ``start_ns`` (pointer position,
+then buttons, then keys), plays the steps in the window shifted to start
+at zero, and finally releases whatever is still held at ``end_ns``.
+"""
+
+from bisect import bisect_left
+
+from core.plan import OP_KEY_DOWN, OP_KEY_UP, OP_MOUSE_DOWN, OP_MOUSE_UP, OP_MOVE, OP_SCROLL, PlaybackPlan
+
+CHECKPOINT_INTERVAL = 1024
+
+
+class HeldState:
+    """Keys and buttons held down, and the index of the last step that moved the pointer."""
+
+    __slots__ = ("keys", "buttons", "pointer")
+
+    def __init__(self, keys=(), buttons=(), pointer=-1):
+        self.keys = set(keys)
+        self.buttons = set(buttons)
+        self.pointer = pointer
+
+    def apply(self, i, step):
+        op, _, _, arg = step
+        if op <= OP_SCROLL:
+            self.pointer = i
+        if op == OP_MOUSE_DOWN:
+            self.buttons.add(arg)
+        elif op == OP_MOUSE_UP:
+            self.buttons.discard(arg)
+        elif op == OP_KEY_DOWN:
+            self.keys.add(arg)
+        elif op == OP_KEY_UP:
+            self.keys.discard(arg)
+
+    def copy(self):
+        return HeldState(self.keys, self.buttons, self.pointer)
+
+
+class HeldIndex:
+    def __init__(self, steps, interval: int = CHECKPOINT_INTERVAL):
+        self.steps = steps
+        self.interval = interval
+        self.checkpoints = []
+        state = HeldState()
+        for i, step in enumerate(steps):
+            if i % interval == 0:
+                self.checkpoints.append((frozenset(state.keys), frozenset(state.buttons), state.pointer))
+            state.apply(i, step)
+
+    def state_at(self, i: int) -> HeldState:
+        """State just before step ``i`` runs (``i == len(steps)`` = after the last step)."""
+        if not self.checkpoints:
+            return HeldState()
+        k = min(i // self.interval, len(self.checkpoints) - 1)
+        state = HeldState(*self.checkpoints[k])
+        steps = self.steps
+        for j in range(k * self.interval, i):
+            state.apply(j, steps[j])
+        return state
+
+
+def held_index(plan: PlaybackPlan) -> HeldIndex:
+    index = getattr(plan, "_held_index", None)
+    if index is None or index.steps is not plan.steps:
+        index = plan._held_index = HeldIndex(plan.steps)
+    return index
+
+
+def release_steps(held: HeldState, steps) -> list:
+    """Steps that let go of everything in ``held`` (keys first, buttons at the last pointer position)."""
+    x = y = 0
+    if held.pointer >= 0:
+        _, x, y, _ = steps[held.pointer]
+    return ([(OP_KEY_UP, 0, 0, key) for key in sorted(held.keys, key=str)]
+            + [(OP_MOUSE_UP, x, y, button) for button in sorted(held.buttons, key=str)])
+
+
+def step_at(plan: PlaybackPlan, t_ns: int) -> int:
+    """Index of the first step due at or after ``t_ns``."""
+    return bisect_left(plan.deadlines, t_ns)
+
+
+def window_plan(plan: PlaybackPlan, start_ns: int = 0, end_ns: int = None) -> PlaybackPlan:
+    """The part of ``plan`` in ``[start_ns, end_ns)`` as a plan starting at 0."""
+    start_ns = max(0, int(start_ns))
+    end_ns = plan.duration_ns if end_ns is None else min(int(end_ns), plan.duration_ns)
+    if end_ns < start_ns:
+        raise ValueError(f"Window ends ({end_ns} ns) before it starts ({start_ns} ns)")
+    if start_ns == 0 and end_ns == plan.duration_ns:
+        return plan
+
+    steps = plan.steps
+    index = held_index(plan)
+    i0 = step_at(plan, start_ns)
+    i1 = step_at(plan, end_ns) if end_ns < plan.duration_ns else len(steps)
+
+    prelude = []
+    held = index.state_at(i0)
+    x = y = 0
+    if held.pointer >= 0:
+        _, x, y, _ = steps[held.pointer]
+        prelude.append((OP_MOVE, x, y, None))
+    prelude += [(OP_MOUSE_DOWN, x, y, button) for button in sorted(held.buttons, key=str)]
+    prelude += [(OP_KEY_DOWN, 0, 0, key) for key in sorted(held.keys, key=str)]
+
+    postlude = release_steps(index.state_at(i1), steps) if i1 < len(steps) else []
+
+    duration_ns = end_ns - start_ns
+    deadlines = [0] * len(prelude) + [t - start_ns for t in plan.deadlines[i0:i1]] + [duration_ns] * len(postlude)
+    return PlaybackPlan(deadlines, prelude + steps[i0:i1] + postlude, duration_ns, plan.geometry)
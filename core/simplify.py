@@ -0,0 +1,201 @@
+"""Mouse path simplification.
+
+Recordings are dominated by "move" events, one per OS callback. Most of them
+sit on a nearly straight line between their neighbours and add nothing but
+injection work at playback time. Two stages drop them:
+
+* ``PathSimplifier`` runs online while recording, one point at a time.
+* ``simplify_events`` runs offline over an existing recording with NumPy.
+
+Both keep every click, scroll and key event untouched, keep the last move
+before and the first move after each of them, and count what they removed.
+Both also keep every move where the path reverses (turns by more than 90
+degrees): distance to a segment cannot see a drag that runs along a line
+and comes back over it, like scrubbing a slider.
+"""
+
+from core.event_store import EV_MOVE
+
+DEFAULT_TOLERANCE_PX = 1.0
+# Above this many buffered points the online window is closed regardless, so
+# a long straight drag costs O(window) per point rather than O(drag length)
+MAX_WINDOW = 64
+
+
+def _segment_distance_sq(ax, ay, bx, by, px, py):
+    # Distance to the segment, not the infinite line, so a path that doubles
+    # back keeps its turning point
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return (px - ax) ** 2 + (py - ay) ** 2
+    u = ((px - ax) * dx + (py - ay) * dy) / length_sq
+    if u <= 0:
+        return (px - ax) ** 2 + (py - ay) ** 2
+    if u >= 1:
+        return (px - bx) ** 2 + (py - by) ** 2
+    cross = dx * (py - ay) - dy * (px - ax)
+    return cross * cross / length_sq
+
+
+class PathSimplifier:
+    """Online opening-window simplifier for a stream of (t, x, y) moves.
+
+    A move is held back until the next one arrives. If every point skipped
+    since the last kept move still lies within ``tolerance_px`` of the
+    segment from that move to the new one, the held move is dropped;
+    otherwise it is kept and becomes the new anchor. Moves closer than
+    ``min_interval_ms`` to the last kept move are dropped outright.
+    """
+
+    def __init__(self, tolerance_px: float = DEFAULT_TOLERANCE_PX, min_interval_ms: float = 0.0):
+        self.tolerance_sq = float(tolerance_px) ** 2
+        self.min_interval_ns = int(min_interval_ms * 1_000_000)
+        self.removed = 0
+        self.reset()
+
+    def reset(self):
+        self._anchor = None
+        self._held = None
+        self._skipped = []
+        # Last non-zero step direction leading into the held move
+        self._direction = (0, 0)
+
+    def add(self, t_ns: int, x: int, y: int):
+        """Feed one move; returns the move to keep, or None."""
+        point = (t_ns, x, y)
+        anchor, held = self._anchor, self._held
+        if anchor is None:
+            self._anchor = point
+            return point
+        if held is None:
+            self._held = point
+            self._direction = (x - anchor[1], y - anchor[2])
+            return None
+
+        step = (x - held[1], y - held[2])
+        direction = self._direction
+        if step != (0, 0):
+            self._direction = step
+        if direction[0] * step[0] + direction[1] * step[1] < 0:
+            # The path reverses at the held move: it is a turning point
+            self._skipped.clear()
+            self._anchor = held
+            self._held = point
+            return held
+
+        if point[0] - anchor[0] < self.min_interval_ns:
+            # Too soon after the last kept move: replace the held move
+            self.removed += 1
+            self._held = point
+            return None
+
+        skipped = self._skipped
+        skipped.append(held)
+        _, ax, ay = anchor
+        tol = self.tolerance_sq
+        if len(skipped) < MAX_WINDOW and all(
+                _segment_distance_sq(ax, ay, x, y, px, py) <= tol for _, px, py in skipped):
+            self.removed += 1
+            self._held = point
+            return None
+
+        # The held move is needed to stay within tolerance; keep it
+        skipped.clear()
+        self._anchor = held
+        self._held = point
+        return held
+
+    @property
+    def pending(self):
+        """The move held back waiting for the next one, or None."""
+        return self._held
+
+    def flush(self):
+        """Release the held move, e.g. before a click or at the end of a recording."""
+        held = self._held
+        if held is not None:
+            self._anchor = held
+        self._held = None
+        self._skipped.clear()
+        return held
+
+
+def simplify_events(source, tolerance_px: float = DEFAULT_TOLERANCE_PX, min_interval_ms: float = 0.0):
+    """Simplify an EventStore or mapped macro; returns (new EventStore, removed count).
+
+    Ramer-Douglas-Peucker over each run of moves between non-move events.
+    Each subdivision step measures its whole span in one NumPy operation.
+    """
+    import numpy as np
+    from core.columns import from_columns, to_columns
+
+    columns = to_columns(source)
+    geometry = getattr(source, "geometry", None)
+    code = columns["code"]
+    n = len(code)
+    if n < 3:
+        return from_columns(columns, source.names, geometry), 0
+
+    is_move = code == EV_MOVE
+    keep = ~is_move
+    move_idx = np.flatnonzero(is_move)
+    if len(move_idx) < 3:
+        return from_columns(columns, source.names, geometry), 0
+
+    # Moves next to a non-move event (or at either end) are fixed endpoints
+    pinned = np.zeros(n, dtype=bool)
+    pinned[move_idx[[0, -1]]] = True
+    pinned[1:] |= is_move[1:] & ~is_move[:-1]
+    pinned[:-1] |= is_move[:-1] & ~is_move[1:]
+
+    x = columns["x"][move_idx].astype(np.float64)
+    y = columns["y"][move_idx].astype(np.float64)
+    tol_sq = float(tolerance_px) ** 2
+    kept = pinned[move_idx].copy()
+
+    # Turning points: the step out of a move points against the last non-zero step into it
+    sx, sy = np.diff(x), np.diff(y)
+    moving = (sx != 0) | (sy != 0)
+    last = np.maximum.accumulate(np.where(moving, np.arange(len(sx)), -1))
+    incoming = last[:-1]
+    valid = incoming >= 0
+    dot = np.where(valid, sx[np.maximum(incoming, 0)] * sx[1:] + sy[np.maximum(incoming, 0)] * sy[1:], 0.0)
+    kept[1:-1] |= dot < 0
+
+    anchors = np.flatnonzero(kept)
+    stack = [(int(a), int(b)) for a, b in zip(anchors[:-1], anchors[1:]) if b - a > 1]
+    while stack:
+        lo, hi = stack.pop()
+        ax, ay, bx, by = x[lo], y[lo], x[hi], y[hi]
+        px, py = x[lo + 1:hi], y[lo + 1:hi]
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        if length_sq == 0:
+            dist_sq = (px - ax) ** 2 + (py - ay) ** 2
+        else:
+            # Project onto the segment, clamped to its endpoints
+            u = np.clip(((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0, 1.0)
+            dist_sq = (ax + u * dx - px) ** 2 + (ay + u * dy - py) ** 2
+        worst = int(np.argmax(dist_sq))
+        if dist_sq[worst] > tol_sq:
+            mid = lo + 1 + worst
+            kept[mid] = True
+            if mid - lo > 1:
+                stack.append((lo, mid))
+            if hi - mid > 1:
+                stack.append((mid, hi))
+
+    min_interval_ns = int(min_interval_ms * 1_000_000)
+    if min_interval_ns > 0:
+        # Keep at most one unpinned move per min_interval time bucket
+        candidates = np.flatnonzero(kept & ~pinned[move_idx])
+        buckets = columns["t"][move_idx[candidates]] // min_interval_ns
+        first_in_bucket = np.ones(len(candidates), dtype=bool)
+        first_in_bucket[1:] = buckets[1:] != buckets[:-1]
+        kept[candidates[~first_in_bucket]] = False
+
+    keep[move_idx[kept]] = True
+    removed = int(n - np.count_nonzero(keep))
+    simplified = from_columns({name: col[keep] for name, col in columns.items()}, source.names, geometry)
+    return simplified, removed
@@ -0,0 +1,180 @@
+"""Append-only recording log (.btlog) for streaming long captures to disk.
+
+Layout (little-endian): a 16-byte header (magic, version, record size),
+then frames of ``tag, payload length, crc32`` followed by the payload:
+
+    GEOM  u16 count + (x, y, w, h) i32 per monitor, once at the start
+    NAME  u32 index of the first new name, then u16 length + UTF-8 per name
+    EVTS  packed records, the same 27-byte RECORD as .btm files
+    END   u64 event count + i64 duration; only present after a clean close
+
+Names are written just before the first chunk that uses them, so every
+intact EVTS frame can be resolved. The file is fsync'ed at most every
+``sync_interval_s``; after a crash, ``recover_log`` keeps every frame up
+to the first torn or corrupt one and writes them out as a normal macro.
+"""
+
+import itertools
+import os
+import struct
+import time
+import zlib
+
+from core.macro_file import (
+    EXTENSION, RECORD, pack_geometry, pack_names, unpack_geometry, unpack_names, write_macro_records,
+)
+
+LOG_MAGIC = b"BTLOG\0\0\0"
+LOG_VERSION = 1
+LOG_EXTENSION = ".btlog"
+
+LOG_HEADER = struct.Struct("<8sHH4x")
+FRAME = struct.Struct("<4sII")
+TAG_GEOMETRY = b"GEOM"
+TAG_NAMES = b"NAME"
+TAG_EVENTS = b"EVTS"
+TAG_END = b"END\0"
+
+_END = struct.Struct("<Qq")
+
+DEFAULT_CHUNK_EVENTS = 4096
+DEFAULT_SYNC_INTERVAL_S = 1.0
+
+
+class StreamLog:
+    """Writer side: append EventStore chunks, then ``close``."""
+
+    def __init__(self, path, geometry=None, sync_interval_s: float = DEFAULT_SYNC_INTERVAL_S):
+        self.path = path
+        self.sync_interval_s = sync_interval_s
+        self.events_written = 0
+        self.duration_ns = 0
+        self.syncs = 0
+        self._names_written = 1  # slot 0 ("") is implicit
+        self._file = open(path, "wb")
+        self._file.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, RECORD.size))
+        geometry = geometry or ()
+        self._frame(TAG_GEOMETRY, pack_geometry(geometry))
+        self.sync()
+
+    def _frame(self, tag, payload):
+        self._file.write(FRAME.pack(tag, len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+
+    def write_chunk(self, store):
+        """Append every event in ``store`` (plus any names it added since the last chunk)."""
+        names = store.names[self._names_written:]
+        if names:
+            self._frame(TAG_NAMES, pack_names(names, self._names_written))
+            self._names_written += len(names)
+
+        count = len(store)
+        if count:
+            records = bytearray(count * RECORD.size)
+            pack_into = RECORD.pack_into
+            offset = 0
+            for rec in store.records():
+                pack_into(records, offset, *rec)
+                offset += RECORD.size
+            self._frame(TAG_EVENTS, records)
+            self.events_written += count
+            self.duration_ns = store.duration_ns()
+        self._file.flush()
+        self._unsynced = True
+        self.sync_due()
+
+    def sync_due(self):
+        """Sync if something is unsynced and the last sync is ``sync_interval_s`` old."""
+        if self._unsynced and time.monotonic() - self._last_sync >= self.sync_interval_s:
+            self.sync()
+
+    def sync(self):
+        """Durability point: everything written so far survives a crash."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+        self._unsynced = False
+        self.syncs += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._frame(TAG_END, _END.pack(self.events_written, self.duration_ns))
+        self.sync()
+        self._file.close()
+
+
+def read_log(path, info=None):
+    """Yield EVTS payloads up to the first torn/corrupt frame.
+
+    ``info`` (a dict) is filled in as frames are read: names, geometry,
+    chunks, clean (END frame seen) and discarded_bytes.
+    """
+    info = info if info is not None else {}
+    names = info.setdefault("names", [""])
+    info.update(geometry=None, chunks=0, clean=False, discarded_bytes=0)
+    with open(path, "rb") as f:
+        data = f.read(LOG_HEADER.size)
+        if len(data) < LOG_HEADER.size:
+            raise ValueError(f"{path} is too short to be a recording log")
+        magic, version, record_size = LOG_HEADER.unpack(data)
+        if magic != LOG_MAGIC or version != LOG_VERSION or record_size != RECORD.size:
+            raise ValueError(f"{path} is not a supported recording log")
+        size = os.fstat(f.fileno()).st_size
+        offset = LOG_HEADER.size
+        while offset < size:
+            head = f.read(FRAME.size)
+            if len(head) < FRAME.size:
+                break
+            tag, length, crc = FRAME.unpack(head)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            offset += FRAME.size + length
+            if tag == TAG_EVENTS:
+                if length % RECORD.size:
+                    break
+                info["chunks"] += 1
+                yield payload
+            elif tag == TAG_NAMES:
+                first, new = unpack_names(payload, 0, length)
+                del names[first:]
+                names.extend(new)
+            elif tag == TAG_GEOMETRY:
+                info["geometry"] = unpack_geometry(payload) or None
+            elif tag == TAG_END:
+                info["clean"] = True
+        info["discarded_bytes"] = size - offset
+
+
+def recover_log(log_path, out_path=None) -> dict:
+    """Turn a (possibly partially written) log into a playable .btm.
+
+    Returns a summary: out_path, events, chunks, clean, discarded_bytes.
+    Memory use is one chunk at a time, whatever the length of the log.
+    """
+    if out_path is None:
+        out_path = os.path.splitext(log_path)[0] + EXTENSION
+    info = {}
+    events = 0
+
+    def chunks():
+        nonlocal events
+        for payload in read_log(log_path, info):
+            events += len(payload) // RECORD.size
+            yield payload
+
+    # Pull the first chunk so the header and GEOM frame have been read; the
+    # name table is read by write_macro_records only after the last chunk,
+    # so names that arrive mid-log are all included
+    blobs = chunks()
+    first = next(blobs, None)
+    write_macro_records(out_path, itertools.chain([first], blobs) if first is not None else (),
+                        info["names"], info["geometry"])
+    return {
+        "out_path": out_path,
+        "events": events,
+        "chunks": info.get("chunks", 0),
+        "clean": info.get("clean", False),
+        "discarded_bytes": info.get("discarded_bytes", 0),
+    }
@@ -0,0 +1,133 @@
+import os
+import customtkinter as ctk
+from tkinter import filedialog
+from CTkMessagebox import CTkMessagebox
+from core.formats import open_macro, write_macro
+from core.library import MACRO_EXTENSIONS
+from core.macro_file import EXTENSION
+from core.simplify import simplify_events
+
+
+class MacroManager(ctk.CTkToplevel):
+    DEFAULT_FG = ctk.ThemeManager.theme["CTkButton"]["fg_color"]
+    DEFAULT_HOVER = ctk.ThemeManager.theme["CTkButton"]["hover_color"]
+    # Sort menu label -> (index column, descending)
+    FILETYPES = [("BetterTask Macros", " ".join(f"*{ext}" for ext in MACRO_EXTENSIONS)),
+                 ("Binary macro", "*.btm"), ("Compressed macro", "*.btz"), ("JSON events", "*.json")]
+    SORTS = {
+        "Name": ("name", False),
+        "Longest": ("duration_ns", True),
+        "Most events": ("events", True),
+        "Newest": ("mtime_ns", True),
+        "Last run": ("last_run_at", True),
+        "Most runs": ("run_count", True),
+    }
+    LIBRARY_ROWS = 200
+
+    def __init__(self, master=None):
+        super().__init__(master)
+        self.parent = master
+
+        self.title("Macro Manager")
+        self.geometry("380x560")
+        self.attributes("-topmost", True)
+        self.resizable(False, False)
+        self.transient(master)
+
+        ctk.CTkLabel(self, text="Macro Manager", font=ctk.CTkFont(size=18, weight="bold")).pack(pady=(15, 10))
+
+        self.current_label = ctk.CTkLabel(self, text=self.current_text(), font=ctk.CTkFont(size=12))
+        self.current_label.pack(pady=(0, 10))
+
+        ctk.CTkButton(self, text="Save Recording", width=200, height=37, command=self.save_recording).pack(pady=5)
+        ctk.CTkButton(self, text="Load Macro", width=200, height=37, command=self.load_macro).pack(pady=5)
+        ctk.CTkButton(self, text="Simplify Recording", width=200, height=37, command=self.simplify_recording).pack(pady=5)
+
+        # Library: listing, sorting and searching only read the index
+        self.library = master.library()
+        search_row = ctk.CTkFrame(self, fg_color="transparent")
+        search_row.pack(fill="x", padx=15, pady=(15, 5))
+        self.search_var = ctk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self.refresh_library())
+        ctk.CTkEntry(search_row, textvariable=self.search_var, placeholder_text="Search name or tag",
+                     width=220).pack(side="left")
+        self.sort_var = ctk.StringVar(value="Name")
+        ctk.CTkOptionMenu(search_row, variable=self.sort_var, values=list(self.SORTS), width=110,
+                          command=lambda _: self.refresh_library()).pack(side="right")
+
+        self.library_frame = ctk.CTkScrollableFrame(self, width=330, height=220)
+        self.library_frame.pack(padx=15, pady=(5, 15), fill="both", expand=True)
+
+        self.scan_library()
+
+    def current_text(self):
+        macro = getattr(self.parent, "loaded_macro", None)
+        if macro is None:
+            return "Current: last recording"
+        return f"Current: {os.path.basename(macro.path)}"
+
+    def save_recording(self):
+        store = self.parent.recorder.store
+        if not len(store):
+            CTkMessagebox(title="Warning", message="Nothing recorded yet.", icon="warning")
+            return
+        path = filedialog.asksaveasfilename(title="Save Macro As", defaultextension=EXTENSION,
+                                            initialdir=self.library.root, filetypes=self.FILETYPES)
+        if not path:
+            return
+        try:
+            write_macro(path, store)
+        except (OSError, ValueError) as e:
+            CTkMessagebox(title="Error", message=f"Failed to save macro: {e}", icon="cancel")
+            return
+        self.library.add(path)
+        self.refresh_library()
+        CTkMessagebox(title="Saved", message=f"Macro saved as {os.path.basename(path)}", icon="check")
+
+    def load_macro(self):
+        path = filedialog.askopenfilename(title="Select Macro", initialdir=self.library.root,
+                                          filetypes=self.FILETYPES)
+        if path:
+            self.open_path(path)
+
+    def open_path(self, path):
+        try:
+            # .btm, .btz or .json; CodecError and MacroFormatError are ValueErrors
+            macro = open_macro(path)
+        except (OSError, ValueError) as e:
+            CTkMessagebox(title="Error", message=f"Failed to load macro: {e}", icon="cancel")
+            return
+        self.parent.set_loaded_macro(macro)
+        self.current_label.configure(text=self.current_text())
+
+    def simplify_recording(self):
+        recorder = self.parent.recorder
+        if recorder.recording or not len(recorder.store):
+            CTkMessagebox(title="Warning", message="Nothing to simplify.", icon="warning")
+            return
+        recorder.store, removed = simplify_events(recorder.store)
+        self.parent.set_label_text(self.parent.events_label, f"Events Recorded: {len(recorder.store)}")
+        CTkMessagebox(title="Simplified", message=f"Removed {removed} move events.", icon="check")
+
+    def scan_library(self):
+        changes = self.library.scan()
+        if any(changes.values()):
+            print(f"[INFO] Macro library: {changes}")
+        self.refresh_library()
+
+    def refresh_library(self):
+        for child in self.library_frame.winfo_children():
+            child.destroy()
+        sort, descending = self.SORTS[self.sort_var.get()]
+        entries = self.library.list(search=self.search_var.get().strip() or None, sort=sort,
+                                    descending=descending, limit=self.LIBRARY_ROWS)
+        if not entries:
+            ctk.CTkLabel(self.library_frame, text="No macros found.").pack(pady=10)
+        for entry in entries:
+            text = f"{entry['name']}  ·  {entry['duration_ns'] / 1e9:.1f}s  ·  {entry['events']} events"
+            if entry["run_count"]:
+                text += f"  ·  {entry['run_count']} runs"
+            if entry["tags"]:
+                text += f"\n{', '.join(entry['tags'])}"
+            ctk.CTkButton(self.library_frame, text=text, anchor="w", fg_color="transparent", border_width=1,
+                          command=lambda path=entry["path"]: self.open_path(path)).pack(fill="x", pady=2)
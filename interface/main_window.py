@@ -1,21 +1,34 @@
+import os
 import time
 import customtkinter as ctk
 import tkinter as tk
 import logging
-import pydirectinput
-from core.recording import Recorder
+import json
+from tkinter import filedialog
+from core.recording import CAPTURE_RING, Recorder
+from core.library import MacroLibrary
+from core.metrics import prometheus_text
 from core.playback import Playback
+from core.stream_log import LOG_EXTENSION, recover_log
+from core.simplify import PathSimplifier
+from utils.paths import app_data_dir
+from utils.screen_helper import start_monitor_watcher
 from interface.settings_window import SettingsWindow
 from interface.settings_manager import SettingsManager
+from interface.macro_manager import MacroManager
 import threading
 
+RECORDINGS_DIR = app_data_dir("recordings")
+
 # Gonna try to make hotkeys work in here prob just gonna connect them to the toggle functions as it will prob work the best (this is gonna be a headache)
 
 class MainWindow(ctk.CTk):
     DEFAULT_FG = ctk.ThemeManager.theme["CTkButton"]["fg_color"]
     DEFAULT_HOVER = ctk.ThemeManager.theme["CTkButton"]["hover_color"]
 
-    def __init__(self):
+    UI_FPS = 10
+
+    def __init__(self, ui_fps: float = UI_FPS):
         super().__init__()
 
         self.title("Better Task")
@@ -28,10 +41,16 @@ class MainWindow(ctk.CTk):
         self.playing_timer_running = False
         self.start_time = None
         self.loop_count = 0
+        self.ui_interval_ms = max(1, int(1000 / ui_fps))
+        self._label_text = {}
 
-        self.recorder = Recorder()
+        start_monitor_watcher()
+        self.recorder = Recorder(simplifier=PathSimplifier(), capture=CAPTURE_RING)
+        self.recover_recordings()
         self.playback = Playback(events=self.recorder.events)
-
+        self.loaded_macro = None
+        self.macro_manager = None
+        self.macro_library = None
 
         self.settings_window = SettingsWindow(self)
         self.settings_window.withdraw()
@@ -73,6 +92,9 @@ class MainWindow(ctk.CTk):
         self.events_label = ctk.CTkLabel(self.inner_frame, text="Events Recorded: 0", font=ctk.CTkFont(size=12))
         self.events_label.pack(fill="y", expand=True)
 
+        self.metrics_label = ctk.CTkLabel(self.inner_frame, text="", font=ctk.CTkFont(size=11))
+        self.metrics_label.pack(fill="y", expand=True)
+
         separator = ctk.CTkFrame(self, height=2, fg_color="gray40")
         separator.pack(fill="x", padx=10, pady=(0, 15))
 
@@ -100,7 +122,8 @@ class MainWindow(ctk.CTk):
             self, text="🎦 Macro Manager",
             fg_color=self.DEFAULT_FG,
             hover_color=self.DEFAULT_HOVER,
-            width=button_width, height=button_height
+            width=button_width, height=button_height,
+            command=self.open_macro_manager
         )
         self.macro_button.pack(pady=(button_pad_y, button_pad_y))
 
@@ -113,34 +136,32 @@ class MainWindow(ctk.CTk):
         )
         self.settings_button.pack(pady=(button_pad_y, button_pad_y))
 
-        self.check_geometry()
+        self.ui_tick()
 
-    def check_geometry(self):
-        current_geometry = self.geometry().split('+')[0]
-        if current_geometry == "240x440":
-            print("The window is 240x440 pixels — using normal layout.")
-        else:
-            print(f"Current geometry: {current_geometry} — use minimized layout.")
-        self.after(1000, self.check_geometry)
+    def set_label_text(self, label, text):
+        # configure() re-renders the widget, so skip it when nothing changed
+        if self._label_text.get(label) != text:
+            self._label_text[label] = text
+            label.configure(text=text)
 
-    def update_timer(self):
-        if self.running:
-            elapsed = int(time.time() - self.start_time)
-            h, m, s = elapsed // 3600, (elapsed % 3600) // 60, elapsed % 60
-            self.timer_label.configure(text=f"Timer: {h:02}:{m:02}:{s:02}")
-            self.after(200, self.update_timer)
-
-    def update_playback_timer(self):
-        if self.playing_timer_running:
-            elapsed = int(time.time() - self.start_time)
-            h, m, s = elapsed // 3600, (elapsed % 3600) // 60, elapsed % 60
-            self.timer_label.configure(text=f"Timer: {h:02}:{m:02}:{s:02}")
-            self.after(200, self.update_playback_timer)
-
-    def update_events(self):
-        self.events_label.configure(text=f"Events Recorded: {len(self.recorder.events)}")
+    @staticmethod
+    def format_elapsed(seconds):
+        seconds = int(seconds)
+        return f"Timer: {seconds // 3600:02}:{(seconds % 3600) // 60:02}:{seconds % 60:02}"
+
+    def ui_tick(self):
+        """The only periodic UI job: read the recorder/player counters and update changed labels."""
         if self.running:
-            self.after(10, self.update_events)
+            self.set_label_text(self.timer_label, self.format_elapsed(time.time() - self.start_time))
+            self.set_label_text(self.events_label, f"Events Recorded: {self.recorder.event_count}")
+            self.set_label_text(self.metrics_label, f"Rate: {self.recorder.metrics.events_per_second:.0f} events/s")
+        elif self.playing_timer_running:
+            lateness = self.playback.metrics.lateness
+            self.set_label_text(self.timer_label, self.format_elapsed(time.time() - self.start_time))
+            self.set_label_text(self.loop_label, f"Loops: {self.loop_count}")
+            self.set_label_text(self.metrics_label,
+                                f"Late p99: {lateness.percentile(99) / 1e6:.2f} ms  max: {lateness.max / 1e6:.1f} ms")
+        self.after(self.ui_interval_ms, self.ui_tick)
 
     def open_settings(self):
         if self.settings_window is None or not self.settings_window.winfo_exists():
@@ -149,50 +170,115 @@ class MainWindow(ctk.CTk):
             self.settings_window.focus_force()
             self.settings_window.deiconify()
 
+    def export_metrics(self):
+        path = filedialog.asksaveasfilename(title="Export Metrics", defaultextension=".json",
+                                            filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom")])
+        if not path:
+            return
+        sessions = [self.recorder.metrics, self.playback.metrics]
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".prom"):
+                f.write(prometheus_text(sessions))
+            else:
+                json.dump([m.snapshot() for m in sessions], f, indent=2)
+        print(f"[INFO] Metrics exported to {path}")
+
+    def recover_recordings(self):
+        """Salvage logs left by a crashed session into the macro library.
+
+        Recordings stream to RECORDINGS_DIR and are finished into a .btm
+        there on stop; those are unsaved scratch files and are dropped at
+        the next start, like the in-memory recording used to be.
+        """
+        if not os.path.isdir(RECORDINGS_DIR):
+            return
+        for filename in os.listdir(RECORDINGS_DIR):
+            path = os.path.join(RECORDINGS_DIR, filename)
+            try:
+                if filename.endswith(LOG_EXTENSION):
+                    out_path = os.path.join(app_data_dir("macros", create=True),
+                                            f"recovered-{os.path.splitext(filename)[0]}.btm")
+                    result = recover_log(path, out_path)
+                    print(f"[INFO] Recovered {result['events']} events from an interrupted recording: {out_path}")
+                os.remove(path)
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Could not recover {path}: {e}")
+
+    def library(self):
+        # Opened on first use so startup never touches the index
+        if self.macro_library is None:
+            self.macro_library = MacroLibrary()
+        return self.macro_library
+
+    def open_macro_manager(self):
+        if self.macro_manager is None or not self.macro_manager.winfo_exists():
+            self.macro_manager = MacroManager(self)
+        else:
+            self.macro_manager.focus_force()
+            self.macro_manager.deiconify()
+
+    def set_loaded_macro(self, macro):
+        if self.loaded_macro is not None and self.loaded_macro is not macro:
+            # Mapped and compressed macros hold a file open; a JSON EventStore does not
+            close = getattr(self.loaded_macro, "close", None)
+            if close is not None:
+                close()
+        self.loaded_macro = macro
+        self.set_label_text(self.events_label, f"Events Loaded: {len(macro)}" if macro is not None else "Events Recorded: 0")
+
     def toggle_recording(self):
         if not self.running:
+            # A fresh recording takes over from whatever macro was loaded
+            self.set_loaded_macro(None)
+            # Stream to disk so a long capture holds one chunk in memory and survives a crash
+            os.makedirs(RECORDINGS_DIR, exist_ok=True)
+            self.recorder.stream_path = os.path.join(RECORDINGS_DIR, time.strftime("session-%Y%m%d-%H%M%S") + LOG_EXTENSION)
             threading.Thread(target=self.recorder.start_recording, daemon=True).start()
             self.record_button.configure(text="⏹️ Stop Recording")
             self.seconds = 0
             self.running = True
             self.start_time = time.time()
-            self.timer_label.configure(text="Timer: 00:00:00")
-            self.update_timer()
-            self.update_events()
+            self.set_label_text(self.timer_label, "Timer: 00:00:00")
         else:
             self.recorder.stop_recording()
             self.running = False
             self.record_button.configure(text="⏺️ Record")
-            self.timer_label.configure(text="Timer: 00:00:00")
+            self.set_label_text(self.timer_label, "Timer: 00:00:00")
+            self.set_label_text(self.events_label, f"Events Recorded: {len(self.recorder.store)}")
 
     def toggle_playback(self):
         if not self.playback.playing:
-            self.playback.events = self.recorder.events
+            self.playback.events = self.loaded_macro if self.loaded_macro is not None else self.recorder.events
+            self.playback.set_timing(*self.settings_window.playback_timing())
+            print(f"[INFO] Playback loop: {self.playback.duration_ns() / 1e9:.2f}s "
+                  f"(~{self.playback.loops_per_hour():.0f} loops/hour)")
             self.play_button.configure(text="⏹️ Stop Playback")
             self.record_button.configure(state="disabled")
             self.start_time = time.time()
             self.playing_timer_running = True
             self.loop_count = 0
-            self.loop_label.configure(text=f"Loops: {self.loop_count}")
-            self.update_playback_timer()
+            self.set_label_text(self.loop_label, f"Loops: {self.loop_count}")
+
+            continuous = self.settings_window.continuous_playback_var.get()
+            loops, duration_s = self.settings_window.loop_limits() if continuous else (1, None)
+
+            def on_loop(done):
+                self.loop_count = done
+                # Unticking "Continuous Playback" ends the run after the current loop
+                return self.settings_window.continuous_playback_var.get()
 
             def run_playback():
-                first_loop = True
-                while first_loop or self.settings_window.continuous_playback_var.get():
-                    first_loop = False
-                    self.playback.start_playback()
-                    self.playback.playing = False
-                    self.loop_count += 1
-                    self.after(0, lambda count=self.loop_count: self.loop_label.configure(text=f"Loops: {count}"))
-                    pydirectinput.mouseUp(button="left")
-                    pydirectinput.mouseUp(button="right")
+                self.playback.play(loops, duration_s, on_loop)
+                macro_path = getattr(self.playback.events, "path", None)
+                if macro_path is not None and self.macro_library is not None:
+                    self.macro_library.record_run(macro_path, self.loop_count, self.playback.metrics)
 
                 self.playing_timer_running = False
                 self.after(0, lambda: (
                     self.play_button.configure(text="▶️ Start Playback"),
                     self.record_button.configure(state="normal"),
-                    self.timer_label.configure(text="Timer: 00:00:00"),
-                    self.loop_label.configure(text="Loops: 0")
+                    self.set_label_text(self.timer_label, "Timer: 00:00:00"),
+                    self.set_label_text(self.loop_label, "Loops: 0")
                 ))
 
             self.playback_thread = threading.Thread(target=run_playback, daemon=True)
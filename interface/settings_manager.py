@@ -1,12 +1,28 @@
+import atexit
+import bisect
 import os
-import json
+import time
 import customtkinter as ctk
 from tkinter import filedialog, Menu
 from CTkMessagebox import CTkMessagebox
 
-APPDATA_DIR = os.path.join(os.getenv("APPDATA"), "Better-Task", "settings", "saves")
+from utils.paths import app_data_dir
+from utils.settings_store import SettingsStore
+
+# Only the paths are worked out here; the directory is created when the manager starts
+APPDATA_DIR = app_data_dir("settings", "saves")
 LAST_USED_FILE = os.path.join(APPDATA_DIR, "last_used.txt")
-os.makedirs(APPDATA_DIR, exist_ok=True)
+# Coarsest directory mtime resolution we expect (FAT/exFAT: 2 s)
+MTIME_SLACK_NS = 2_000_000_000
+
+# Non-boolean settings and their defaults, mirrored by SettingsWindow's <name>_var
+VALUE_SETTINGS = {
+    "playback_speed": 1.0,
+    "idle_gap_ms": "0",
+    "idle_gap_to_ms": "100",
+    "loop_count": "0",
+    "loop_minutes": "0",
+}
 
 class SettingsManager(ctk.CTkToplevel):
     instance = None
@@ -37,6 +53,7 @@ class SettingsManager(ctk.CTkToplevel):
             return
 
         super().__init__(master)
+        os.makedirs(APPDATA_DIR, exist_ok=True)
         SettingsManager.instance = self
         self.parent = master
         self.title("Settings Manager")
@@ -52,11 +69,19 @@ class SettingsManager(ctk.CTkToplevel):
         self.SELECTED_FG = "#228B22"
         self.SELECTED_HOVER = "#005700"
 
-        self._last_files = set()
+        # file name -> button; only files added/removed since the last listing are touched
+        self._buttons = {}
+        self._highlighted = None
+        self._dir_mtime_ns = None
+        self._listed_at_ns = 0
         self._refresh_interval_ms = refresh_interval_ms
         self._selected_file = None
         self._suspend_traces = False
         self._dirty_files = set()
+        # Settings files are parsed once and written debounced; anything still
+        # pending is written when the window closes or the app exits
+        self.store = SettingsStore()
+        atexit.register(self.store.flush)
 
         self.bool_settings = {}
         bool_names = [
@@ -73,8 +98,21 @@ class SettingsManager(ctk.CTkToplevel):
                 var = ctk.BooleanVar(master=self, value=False)
             self.bool_settings[name] = var
 
+        self.value_settings = {}
+        for name, default in VALUE_SETTINGS.items():
+            var_name = f"{name}_var"
+            if master and hasattr(master, var_name):
+                var = getattr(master, var_name)
+            elif isinstance(default, float):
+                var = ctk.DoubleVar(master=self, value=default)
+            else:
+                var = ctk.StringVar(master=self, value=default)
+            self.value_settings[name] = var
+
         for name, var in self.bool_settings.items():
             var.trace_add("write", lambda *a, n=name: self.on_bool_change(n))
+        for name, var in self.value_settings.items():
+            var.trace_add("write", lambda *a, n=name: self.on_bool_change(n))
 
         if master:
             self.setup_ui()
@@ -108,49 +146,71 @@ class SettingsManager(ctk.CTkToplevel):
         ctk.CTkButton(new_frame, text="Create New", command=self.create_new).pack(side="left", padx=(0, 6))
 
     def refresh_list(self):
+        """Bring the file buttons up to date with the directory.
+
+        The directory is listed only when its mtime moves (file added,
+        removed or renamed), and then only the affected buttons are created
+        or destroyed. Button colours change only when the selection does.
+        """
         try:
-            files = {f for f in os.listdir(APPDATA_DIR) if f.endswith(".json")}
+            st = os.stat(APPDATA_DIR)
         except FileNotFoundError:
-            files = set()
-        if files == self._last_files:
-            for widget in self.scroll_frame.winfo_children():
-                try:
-                    text = widget.cget("text")
-                except Exception:
-                    continue
-                path = os.path.join(APPDATA_DIR, text)
-                try:
-                    is_selected = bool(self._selected_file) and os.path.normpath(self._selected_file) == os.path.normpath(path)
-                except Exception:
-                    is_selected = False
-                if is_selected:
-                    widget.configure(fg_color=self.SELECTED_FG, hover_color=self.SELECTED_HOVER)
-                else:
-                    widget.configure(fg_color=self.DEFAULT_FG, hover_color=self.DEFAULT_HOVER)
+            st = None
+        stamp = st.st_mtime_ns if st is not None else None
+        now = time.time_ns()
+        # An mtime within the filesystem's timestamp granularity of the last
+        # listing could hide a second change in the same tick; list again then
+        if stamp != self._dir_mtime_ns or (stamp is not None and self._listed_at_ns - stamp < MTIME_SLACK_NS):
+            self._dir_mtime_ns = stamp
+            self._listed_at_ns = now
+            try:
+                files = {f for f in os.listdir(APPDATA_DIR) if f.endswith(".json")}
+            except FileNotFoundError:
+                files = set()
+            self._sync_buttons(files)
+        self._apply_selection()
+
+    def _sync_buttons(self, files):
+        buttons = self._buttons
+        for file in buttons.keys() - files:
+            buttons.pop(file).destroy()
+            if file == self._highlighted:
+                self._highlighted = None
+        added = sorted(files - buttons.keys())
+        if not added:
             return
-        self._last_files = files
-        for widget in self.scroll_frame.winfo_children():
-            widget.destroy()
-
-        for file in sorted(files):
+        existing = sorted(buttons)
+        for file in added:
             path = os.path.join(APPDATA_DIR, file)
+            # New buttons get the theme's default colours; _apply_selection highlights the selected one
             btn = ctk.CTkButton(self.scroll_frame, text=file, anchor="w", command=lambda p=path: self.switch_file(p))
-            btn.pack(fill="x", padx=6, pady=3)
-
-            # Apply selected/unselected colors. Use normalized paths for comparison
-            try:
-                is_selected = bool(self._selected_file) and os.path.normpath(self._selected_file) == os.path.normpath(path)
-            except Exception:
-                is_selected = False
-            if is_selected:
-                btn.configure(fg_color=self.SELECTED_FG, hover_color=self.SELECTED_HOVER)
+            # Keep the list alphabetical without repacking the buttons already shown
+            i = bisect.bisect(existing, file)
+            if i < len(existing):
+                btn.pack(fill="x", padx=6, pady=3, before=buttons[existing[i]])
             else:
-                btn.configure(fg_color=self.DEFAULT_FG, hover_color=self.DEFAULT_HOVER)
+                btn.pack(fill="x", padx=6, pady=3)
+            existing.insert(i, file)
+            buttons[file] = btn
 
             menu = Menu(self, tearoff=0)
             menu.add_command(label="Delete", command=lambda f=path: self.delete_settings_file(f))
             btn.bind("<Button-3>", lambda e, m=menu: m.tk_popup(e.x_root, e.y_root))
 
+    def _apply_selection(self):
+        selected = None
+        if self._selected_file and os.path.normpath(os.path.dirname(self._selected_file)) == os.path.normpath(APPDATA_DIR):
+            selected = os.path.basename(self._selected_file)
+        if selected == self._highlighted:
+            return
+        previous = self._buttons.get(self._highlighted)
+        if previous is not None:
+            previous.configure(fg_color=self.DEFAULT_FG, hover_color=self.DEFAULT_HOVER)
+        current = self._buttons.get(selected)
+        if current is not None:
+            current.configure(fg_color=self.SELECTED_FG, hover_color=self.SELECTED_HOVER)
+        self._highlighted = selected if current is not None else None
+
     def switch_file(self, path):
         if self._selected_file in self._dirty_files:
             self.save_file(self._selected_file)
@@ -158,11 +218,12 @@ class SettingsManager(ctk.CTkToplevel):
 
     def load_settings(self, path):
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = self.store.load(path)
             self._suspend_traces = True
             for key, var in self.bool_settings.items():
                 var.set(bool(data.get(key, False)))
+            for key, var in self.value_settings.items():
+                var.set(data.get(key, VALUE_SETTINGS[key]))
             self._selected_file = path
             self.write_last_used(path)
             print(f"[INFO] Settings loaded: {path}")
@@ -173,16 +234,14 @@ class SettingsManager(ctk.CTkToplevel):
         finally:
             self._suspend_traces = False
 
-    def save_file(self, path):
-        try:
-            data = {k: v.get() for k, v in self.bool_settings.items()}
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-            if path in self._dirty_files:
-                self._dirty_files.remove(path)
+    def save_file(self, path, debounce=False):
+        # Debounced saves (toggling with saveOnChange) coalesce into one write per burst
+        data = {k: v.get() for k, v in self.bool_settings.items()}
+        data.update({k: v.get() for k, v in self.value_settings.items()})
+        self.store.save(path, data, immediate=not debounce)
+        self._dirty_files.discard(path)
+        if not debounce:
             print(f"[INFO] Saved settings: {path}")
-        except Exception as e:
-            print(f"[ERROR] Failed to save file: {e}")
 
     def edit_current(self):
         if not self._selected_file:
@@ -212,16 +271,14 @@ class SettingsManager(ctk.CTkToplevel):
         file_path = filedialog.askopenfilename(title="Select Settings JSON", filetypes=[("JSON Files", "*.json")])
         if not file_path:
             return
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = self.store.load(file_path)
         name = os.path.splitext(os.path.basename(file_path))[0]
         dest_path = os.path.join(APPDATA_DIR, f"{name}.json")
         counter = 1
         while os.path.exists(dest_path):
             dest_path = os.path.join(APPDATA_DIR, f"{name}_{counter}.json")
             counter += 1
-        with open(dest_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        self.store.save(dest_path, data, immediate=True)
         self._selected_file = dest_path
         self.write_last_used(dest_path)
         CTkMessagebox(title="Imported", message=f"Settings imported as '{os.path.basename(dest_path)}'", icon="check")
@@ -234,10 +291,7 @@ class SettingsManager(ctk.CTkToplevel):
         export_path = filedialog.asksaveasfilename(title="Export Settings As", defaultextension=".json", filetypes=[("JSON Files", "*.json")])
         if not export_path:
             return
-        with open(self._selected_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        with open(export_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        self.store.save(export_path, self.store.load(self._selected_file), immediate=True)
         CTkMessagebox(title="Exported", message=f"Settings exported to {export_path}", icon="check")
 
     def delete_settings_file(self, path):
@@ -245,6 +299,7 @@ class SettingsManager(ctk.CTkToplevel):
         if msg.get() != "Yes":
             return
         try:
+            self.store.forget(path)
             os.remove(path)
             if self._selected_file and os.path.normpath(self._selected_file) == os.path.normpath(path):
                 self._selected_file = None
@@ -255,6 +310,7 @@ class SettingsManager(ctk.CTkToplevel):
             CTkMessagebox(title="Error", message=f"Failed to delete: {e}", icon="cancel")
 
     def on_close(self):
+        self.store.flush()
         SettingsManager.instance = None
         self.destroy()
 
@@ -267,28 +323,22 @@ class SettingsManager(ctk.CTkToplevel):
     def on_bool_change(self, changed_name):
         if self._suspend_traces:
             return
-        var = self.bool_settings.get(changed_name)
+        var = self.bool_settings.get(changed_name) or self.value_settings.get(changed_name)
         print(f"[DEBUG] {changed_name} changed -> {var.get()}")
         if self._selected_file and self.bool_settings.get("saveOnChange").get():
-            self.save_file(self._selected_file)
+            self.save_file(self._selected_file, debounce=True)
         else:
             self._dirty_files.add(self._selected_file)
 
     def write_last_used(self, path):
-        try:
-            with open(LAST_USED_FILE, "w", encoding="utf-8") as f:
-                f.write(os.path.basename(path))
-            print(f"[INFO] Last used settings saved: {LAST_USED_FILE}")
-        except Exception as e:
-            print(f"[ERROR] Failed writing last used file: {e}")
+        self.store.save_text(LAST_USED_FILE, os.path.basename(path))
 
     def load_last_used(self):
         if not os.path.exists(LAST_USED_FILE):
             print("[INFO] No last-used file found")
             return
         try:
-            with open(LAST_USED_FILE, "r", encoding="utf-8") as f:
-                last_file = f.read().strip()
+            last_file = self.store.load_text(LAST_USED_FILE).strip()
             candidate = os.path.join(APPDATA_DIR, last_file)
             if os.path.exists(candidate):
                 print(f"[INFO] Loading last-used settings: {candidate}")
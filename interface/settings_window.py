@@ -20,6 +20,11 @@ class SettingsWindow(ctk.CTkToplevel):
         self.minimize_to_tray_var = ctk.BooleanVar(value=False)
         self.minimalistic_mode_var = ctk.BooleanVar(value=False)
         self.saveOnChange_var = ctk.BooleanVar(value=False)
+        self.playback_speed_var = ctk.DoubleVar(value=1.0)
+        self.idle_gap_ms_var = ctk.StringVar(value="0")
+        self.idle_gap_to_ms_var = ctk.StringVar(value="100")
+        self.loop_count_var = ctk.StringVar(value="0")
+        self.loop_minutes_var = ctk.StringVar(value="0")
 
         self.settings_manager = settings_manager
 
@@ -48,6 +53,7 @@ class SettingsWindow(ctk.CTkToplevel):
         # Define sections
         self.sections = {
             "General": self.show_general,
+            "Playback": self.show_playback,
             "Misc": self.show_misc}
 
                 # Track current selected button
@@ -99,12 +105,53 @@ class SettingsWindow(ctk.CTkToplevel):
         ctk.CTkButton(self.options_scroll_frame, width=self.buttonWidth, height=self.buttonHeight, text="Open Settings Manager",command=self.open_settings_manager).pack(pady=10, padx=20, anchor="w")
         ctk.CTkCheckBox(self.options_scroll_frame, text="Auto Save Settings on Change", variable=self.saveOnChange_var).pack(pady=5, anchor="w")
 
+    def show_playback(self):
+        ctk.CTkLabel(self.options_scroll_frame, text="Playback Settings", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=(0,10), anchor="w")
+        speed_label = ctk.CTkLabel(self.options_scroll_frame, text=f"Speed: {self.playback_speed_var.get():.1f}x")
+        speed_label.pack(pady=(5, 0), anchor="w")
+        ctk.CTkSlider(self.options_scroll_frame, from_=0.5, to=20, number_of_steps=39, variable=self.playback_speed_var,
+                      command=lambda v: speed_label.configure(text=f"Speed: {v:.1f}x")).pack(pady=5, anchor="w")
+        ctk.CTkLabel(self.options_scroll_frame, text="Shorten idle gaps longer than (ms, 0 = off):").pack(pady=(10, 0), anchor="w")
+        ctk.CTkEntry(self.options_scroll_frame, width=self.buttonWidth, textvariable=self.idle_gap_ms_var).pack(pady=5, anchor="w")
+        ctk.CTkLabel(self.options_scroll_frame, text="...down to (ms):").pack(pady=(10, 0), anchor="w")
+        ctk.CTkEntry(self.options_scroll_frame, width=self.buttonWidth, textvariable=self.idle_gap_to_ms_var).pack(pady=5, anchor="w")
+        ctk.CTkLabel(self.options_scroll_frame, text="Continuous: stop after loops (0 = no limit):").pack(pady=(10, 0), anchor="w")
+        ctk.CTkEntry(self.options_scroll_frame, width=self.buttonWidth, textvariable=self.loop_count_var).pack(pady=5, anchor="w")
+        ctk.CTkLabel(self.options_scroll_frame, text="Continuous: stop after minutes (0 = no limit):").pack(pady=(10, 0), anchor="w")
+        ctk.CTkEntry(self.options_scroll_frame, width=self.buttonWidth, textvariable=self.loop_minutes_var).pack(pady=5, anchor="w")
+
+    def playback_timing(self):
+        # Entries are free text; anything unparsable falls back to "no cap"
+        try:
+            idle_gap_ms = max(0.0, float(self.idle_gap_ms_var.get()))
+            idle_gap_to_ms = max(0.0, float(self.idle_gap_to_ms_var.get()))
+        except ValueError:
+            idle_gap_ms, idle_gap_to_ms = 0.0, 0.0
+        return max(0.5, float(self.playback_speed_var.get())), idle_gap_ms, idle_gap_to_ms
+
+    def loop_limits(self):
+        # (loops, duration_s) for continuous playback; unparsable entries mean "no limit"
+        try:
+            loops = max(0, int(self.loop_count_var.get()))
+        except ValueError:
+            loops = 0
+        try:
+            minutes = max(0.0, float(self.loop_minutes_var.get()))
+        except ValueError:
+            minutes = 0.0
+        return loops, minutes * 60 or None
+
     def show_misc(self):
         ctk.CTkLabel(self.options_scroll_frame, text="Miscellaneous Settings", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=(0,10), anchor="w")
         ctk.CTkLabel(self.options_scroll_frame, text="Version: 1.0.0").pack(pady=5, anchor="w")
         ctk.CTkLabel(self.options_scroll_frame, text="Developer: AirWolfShooter").pack(pady=5, anchor="w")
         ctk.CTkButton(self.options_scroll_frame, width=self.buttonWidth, height=self.buttonHeight, text="Check for Updates").pack(pady=10, padx=20, anchor="w")
         ctk.CTkButton(self.options_scroll_frame, width=self.buttonWidth, height=self.buttonHeight, text="View Logs").pack(pady=5, padx=20, anchor="w")
+        ctk.CTkButton(self.options_scroll_frame, width=self.buttonWidth, height=self.buttonHeight, text="Export Metrics", command=self.export_metrics).pack(pady=5, padx=20, anchor="w")
+
+    def export_metrics(self):
+        if hasattr(self.master, "export_metrics"):
+            self.master.export_metrics()
 
     def open_settings_manager(self):
         # Create or retrieve the manager, then ensure it's visible and focused.
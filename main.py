@@ -1,5 +1,6 @@
-from interface.main_window import MainWindow
-
 if __name__ == "__main__":
+    # Imported here so that importing main (e.g. from tooling) does not pull in Tk
+    from interface.main_window import MainWindow
+
     app = MainWindow()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
@@ -0,0 +1,14 @@
+import os
+
+
+def app_data_dir(*parts: str, create: bool = False) -> str:
+    """Per-user Better-Task data directory (optionally a subdirectory of it).
+
+    Uses %APPDATA% on Windows and falls back to $XDG_CONFIG_HOME or ~/.config
+    elsewhere. Nothing is created unless ``create`` is set.
+    """
+    base = os.getenv("APPDATA") or os.getenv("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    path = os.path.join(base, "Better-Task", *parts)
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
@@ -1,58 +1,118 @@
-import screeninfo
 import threading
-import time
+from typing import NamedTuple
 
-# monitor state variables
-_min_x, _min_y, _total_width, _total_height = 0, 0, 1, 1  # defaults
-_monitor_lock = threading.Lock()
 
+class MonitorSnapshot(NamedTuple):
+    """Immutable desktop geometry. ``version`` goes up whenever it changes."""
+    version: int
+    min_x: int
+    min_y: int
+    total_width: int
+    total_height: int
+    monitors: tuple = ()  # ((x, y, width, height), ...) in screeninfo order
 
-def capture_monitor_state():
-    monitors = screeninfo.get_monitors()
-    min_x = min(m.x for m in monitors)
-    min_y = min(m.y for m in monitors)
-    max_x = max(m.x + m.width for m in monitors)
-    max_y = max(m.y + m.height for m in monitors)
+
+# Readers just load this reference; a refresh swaps in a new tuple, so no lock
+# is needed to get a consistent view (reference assignment is atomic)
+_snapshot = MonitorSnapshot(0, 0, 0, 1, 1)
+_refresh_lock = threading.Lock()
+_watcher_stop = None
+_refresh_failed = False
+
+
+def capture_monitors():
+    import screeninfo
+    return tuple((m.x, m.y, m.width, m.height) for m in screeninfo.get_monitors())
+
+
+def bounding_rect(monitors):
+    """(x, y, width, height) of the box around every monitor."""
+    min_x = min(x for x, _, _, _ in monitors)
+    min_y = min(y for _, y, _, _ in monitors)
+    max_x = max(x + w for x, _, w, _ in monitors)
+    max_y = max(y + h for _, y, _, h in monitors)
     return min_x, min_y, max_x - min_x, max_y - min_y
 
 
-def refresh_monitor_state():
-    global _min_x, _min_y, _total_width, _total_height
-    with _monitor_lock:
-        _min_x, _min_y, _total_width, _total_height = capture_monitor_state()
+def current_snapshot() -> MonitorSnapshot:
+    # Geometry is queried the first time someone needs it, not at import
+    global _refresh_failed
+    if _snapshot.version == 0 and not _refresh_failed:
+        try:
+            return refresh_monitor_state()
+        except Exception as e:
+            _refresh_failed = True
+            print(f"[WARN] Could not read monitor layout: {e}")
+    return _snapshot
 
 
-def start_monitor_watcher(interval: float = 1.0):
+def refresh_monitor_state() -> MonitorSnapshot:
+    global _snapshot
+    monitors = capture_monitors()
+    # Only writers serialise; the version must not be bumped twice for one change
+    with _refresh_lock:
+        current = _snapshot
+        if current.monitors != monitors:
+            _snapshot = MonitorSnapshot(current.version + 1, *bounding_rect(monitors), monitors)
+        return _snapshot
+
+
+def start_monitor_watcher(interval: float = 1.0, max_interval: float = 30.0):
+    """Re-check monitor geometry in the background.
+
+    The poll interval doubles (up to ``max_interval``) while nothing changes
+    and drops back to ``interval`` after a change, so a static desktop costs
+    one screeninfo query every 30 s instead of every second.
+    """
+    global _watcher_stop
+    if _watcher_stop is not None and not _watcher_stop.is_set():
+        return _watcher_stop
+    stop = _watcher_stop = threading.Event()
+
     def watcher():
-        global _min_x, _min_y, _total_width, _total_height
-        prev_state = None
-        while True:
-            state = capture_monitor_state()
-            if state != prev_state:
-                with _monitor_lock:
-                    _min_x, _min_y, _total_width, _total_height = state
-                print(f"[MonitorWatcher] Resolution changed → {state[2]}x{state[3]}")
-                prev_state = state
-            time.sleep(interval)
-
-    threading.Thread(target=watcher, daemon=True).start()
-
-
-def normalize_coords(x: int, y: int) -> tuple[float, float]:
-    with _monitor_lock:
-        nx = (x - _min_x) / _total_width
-        ny = (y - _min_y) / _total_height
-    return nx, ny
+        delay = interval
+        while not stop.wait(delay):
+            version = _snapshot.version
+            state = refresh_monitor_state()
+            if state.version != version:
+                print(f"[MonitorWatcher] Resolution changed → {state.total_width}x{state.total_height}")
+                delay = interval
+            else:
+                delay = min(delay * 2, max_interval)
 
+    threading.Thread(target=watcher, name="monitor-watcher", daemon=True).start()
+    return stop
+
+
+def stop_monitor_watcher():
+    if _watcher_stop is not None:
+        _watcher_stop.set()
+
+
+def normalize_coords(x: int, y: int, snapshot: MonitorSnapshot = None) -> tuple[float, float]:
+    s = snapshot or current_snapshot()
+    return (x - s.min_x) / s.total_width, (y - s.min_y) / s.total_height
+
+
+def denormalize_coords(nx: float, ny: float, snapshot: MonitorSnapshot = None) -> tuple[int, int]:
+    s = snapshot or current_snapshot()
+    return int(nx * s.total_width + s.min_x), int(ny * s.total_height + s.min_y)
+
+
+def normalize_array(xs, ys, snapshot: MonitorSnapshot = None):
+    """Normalise whole coordinate arrays in one NumPy pass; returns float64 arrays."""
+    import numpy as np
+    s = snapshot or current_snapshot()
+    nx = (np.asarray(xs, dtype=np.float64) - s.min_x) / s.total_width
+    ny = (np.asarray(ys, dtype=np.float64) - s.min_y) / s.total_height
+    return nx, ny
 
-def denormalize_coords(nx: float, ny: float) -> tuple[int, int]:
-    with _monitor_lock:
-        x = int(nx * _total_width + _min_x)
-        y = int(ny * _total_height + _min_y)
-    return x, y
 
+def denormalize_array(nx, ny, snapshot: MonitorSnapshot = None):
+    """Inverse of normalize_array; truncates to int32 like denormalize_coords."""
+    import numpy as np
+    s = snapshot or current_snapshot()
+    xs = (np.asarray(nx, dtype=np.float64) * s.total_width + s.min_x).astype(np.int32)
+    ys = (np.asarray(ny, dtype=np.float64) * s.total_height + s.min_y).astype(np.int32)
+    return xs, ys
 
-# Check once at startup
-refresh_monitor_state()
-# Start background watcher (updates if resolution/monitors change)
-start_monitor_watcher()
@@ -0,0 +1,107 @@
+"""Cached, debounced, atomic persistence for small JSON/text settings files.
+
+* ``load`` parses a file once and then serves it from memory until the
+  file's mtime or size changes on disk.
+* ``save`` updates the cache straight away and schedules the write;
+  further saves within ``delay_s`` push the write back, so a burst of
+  changes costs one write per file.
+* Every write goes to a temp file that is then renamed over the target,
+  so a crash never leaves a half-written file.
+
+Nothing here needs Tk; the delayed flush runs on a timer thread.
+"""
+
+import json
+import os
+import threading
+
+DEFAULT_DELAY_S = 0.5
+
+
+def atomic_write_text(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class SettingsStore:
+    def __init__(self, delay_s: float = DEFAULT_DELAY_S):
+        self.delay_s = delay_s
+        self.writes = 0
+        self._cache = {}  # path -> ((mtime_ns, size), value)
+        self._pending = {}  # path -> value not yet on disk
+        self._lock = threading.RLock()
+        self._timer = None
+
+    @staticmethod
+    def _stamp(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def _read(self, path, parse):
+        with self._lock:
+            if path in self._pending:
+                return self._pending[path]
+            stamp = self._stamp(path)
+            cached = self._cache.get(path)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+        with open(path, "r", encoding="utf-8") as f:
+            value = parse(f.read())
+        with self._lock:
+            self._cache[path] = (stamp, value)
+        return value
+
+    def load(self, path) -> dict:
+        """Parsed JSON for ``path`` (a copy, so callers may modify it)."""
+        return dict(self._read(path, json.loads))
+
+    def load_text(self, path) -> str:
+        return self._read(path, str)
+
+    def save(self, path, data: dict, immediate: bool = False):
+        self._schedule(path, dict(data), immediate)
+
+    def save_text(self, path, text: str, immediate: bool = False):
+        self._schedule(path, str(text), immediate)
+
+    def _schedule(self, path, value, immediate):
+        with self._lock:
+            self._pending[path] = value
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not immediate:
+                self._timer = threading.Timer(self.delay_s, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """Write every pending file now."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, {}
+            for path, value in pending.items():
+                text = value if isinstance(value, str) else json.dumps(value, indent=2)
+                try:
+                    atomic_write_text(path, text)
+                except OSError as e:
+                    print(f"[ERROR] Failed to save {path}: {e}")
+                    continue
+                self.writes += 1
+                self._cache[path] = (self._stamp(path), value)
+
+    def forget(self, path):
+        """Drop a file from the cache and pending writes, e.g. after deleting it."""
+        with self._lock:
+            self._cache.pop(path, None)
+            self._pending.pop(path, None)
+
+    @property
+    def dirty(self):
+        return bool(self._pending)